@@ -1,10 +1,13 @@
+from concurrent.futures import Executor, Future
+import heapq
 import io
-import json
+import itertools
 import logging
-import threading
+import operator
 from types import TracebackType
 from typing import (
-    cast, Dict, Hashable, Iterable, List, Optional, Set, Tuple, Union, Sequence, Callable
+    AbstractSet, cast, Dict, FrozenSet, Hashable, Iterable, List, Optional, Set, Tuple, Union, Sequence,
+    Callable
 )
 import uuid
 import zipfile
@@ -16,10 +19,23 @@ from smqtk_indexing.utils.metrics import euclidean_distance
 
 from smqtk_relevancy import RankRelevancyWithFeedback
 from smqtk_descriptors.impls.descriptor_set.memory import MemoryDescriptorSet
+from smqtk_descriptors.utils.parallel import parallel_map
 from smqtk_descriptors import (
     DescriptorElement, DescriptorElementFactory
 )
 
+from smqtk_iqr.utils.fast_json import json_dumps, json_loads
+from smqtk_iqr.utils.rwlock import RWLock
+
+
+def _check_k(k: Optional[int]) -> None:
+    """
+    Reject a negative ``k`` for result views, for which slicing a cached view
+    and selecting from uncached results would otherwise disagree.
+    """
+    if k is not None and k < 0:
+        raise ValueError("k must be non-negative, given {}".format(k))
+
 
 class IqrSession ():
     """
@@ -30,14 +46,16 @@ class IqrSession ():
     are to be used or modified, it should be within a with-block so race
     conditions do not occur across threads/sub-processes.
 
+    The ``lock`` attribute is a :class:`smqtk_iqr.utils.rwlock.RWLock`. Using
+    the session (or the lock itself) in a with-statement acquires the
+    exclusive write lock. Read-only result accessors only take the shared read
+    lock, so concurrent result queries do not serialize against each other.
+
     """
 
     @property
     def _log(self) -> logging.Logger:
-        return logging.getLogger(
-            '.'.join((self.__module__, self.__class__.__name__)) +
-            "[%s]" % self.uuid
-        )
+        return self._log_instance
 
     def __init__(
         self, rank_relevancy_with_feedback: RankRelevancyWithFeedback,
@@ -74,7 +92,8 @@ class IqrSession ():
 
         :param session_uid: Optional manual specification of session UUID. By
             default this will be a string UUID as generated by
-            ``uuid.uuid1()``.
+            ``uuid.uuid1()``. A ``uuid.UUID`` instance given is stored as its
+            hex string.
 
         :param distance_metric: Optional manual specification of distance metric
             function to use for auto-negative descriptor selection. It is
@@ -88,8 +107,17 @@ class IqrSession ():
             negative to positive adjudications to use during auto-negative
             adjudication selection. By default this will 1.
         """
-        self.uuid = session_uid or str(uuid.uuid1()).replace('-', '')
-        self.lock = threading.RLock()
+        self.uuid: str
+        if isinstance(session_uid, uuid.UUID):
+            self.uuid = session_uid.hex
+        else:
+            self.uuid = session_uid or uuid.uuid1().hex
+        self.lock = RWLock()
+        # Logger is specific to this session, so look it up only once.
+        self._log_instance = logging.getLogger(
+            '.'.join((self.__module__, self.__class__.__name__)) +
+            "[%s]" % self.uuid
+        )
 
         self.pos_seed_neighbors = int(pos_seed_neighbors)
         self.distance_metric = distance_metric
@@ -100,10 +128,31 @@ class IqrSession ():
         # Added external data/descriptors not added to this set.
         self.working_set = MemoryDescriptorSet()
 
+        # Row-major matrix of ``working_set`` descriptor vectors, maintained
+        #   in parallel to the set as it grows so that refinement does not
+        #   need to fetch every vector. Rows beyond ``_ws_len`` are spare
+        #   capacity. Rows are only ever appended until reset.
+        self._ws_matrix: Optional[np.ndarray] = None
+        self._ws_len = 0
+        # Descriptors and their UIDs in matrix row order, and the mapping of
+        #   UID to row index.
+        self._ws_descriptors: List[DescriptorElement] = []
+        self._ws_uids: List[Hashable] = []
+        self._ws_uid_index: Dict[Hashable, int] = {}
+
         # Book-keeping set so we know what positive descriptors
         # UUIDs we've used to query the neighbor index with already.
         self._wi_seeds_used: Set[Hashable] = set()
 
+        # Counter incremented whenever the adjudication state or working set
+        #   changes. Used by ``refine`` to detect modification while ranking
+        #   outside of the lock.
+        self._state_generation = 0
+
+        # Cache of descriptor vectors by descriptor UID, populated as vectors
+        #   are fetched for refinement.
+        self._vector_cache: Dict[Hashable, np.ndarray] = {}
+
         # Descriptor elements representing data from external sources.
         # These may be arbitrary descriptor elements not present in
         #   ``working_index``.
@@ -117,15 +166,29 @@ class IqrSession ():
         self.positive_descriptors: Set[DescriptorElement] = set()
         self.negative_descriptors: Set[DescriptorElement] = set()
 
+        # Lazily computed unions of the adjudicated and external positive and
+        #   negative descriptor sets. These are invalidated by ``adjudicate``,
+        #   ``external_descriptors`` and ``reset``, so the above sets should
+        #   only be modified via those methods once a union has been computed.
+        self._pos_union_cache: Optional[FrozenSet[DescriptorElement]] = None
+        self._neg_union_cache: Optional[FrozenSet[DescriptorElement]] = None
+
         # Sets of descriptor elements that were used in the last refinement
         #   to achieve the currently cached results, i.e. "contributed" to the
         #   current results state.
-        # These sets are empty before the first refine after construction or a
-        #   reset.
-        self.rank_contrib_pos: Set[DescriptorElement] = set()
-        self.rank_contrib_pos_ext: Set[DescriptorElement] = set()
-        self.rank_contrib_neg: Set[DescriptorElement] = set()
-        self.rank_contrib_neg_ext: Set[DescriptorElement] = set()
+        # Refine assigns these immutable snapshots, only replaced by the next
+        #   refine, and they are empty before the first refine after
+        #   construction or a reset. Assigned sets should not be modified
+        #   afterwards.
+        self.rank_contrib_pos: AbstractSet[DescriptorElement] = frozenset()
+        self.rank_contrib_pos_ext: AbstractSet[DescriptorElement] = frozenset()
+        self.rank_contrib_neg: AbstractSet[DescriptorElement] = frozenset()
+        self.rank_contrib_neg_ext: AbstractSet[DescriptorElement] = frozenset()
+        # Unions of the above adjudicated and external sets, and of all four.
+        #   These are computed by ``refine``, or lazily if None.
+        self._rank_contrib_pos_all: Optional[FrozenSet[DescriptorElement]] = None
+        self._rank_contrib_neg_all: Optional[FrozenSet[DescriptorElement]] = None
+        self._rank_contrib_all: Optional[FrozenSet[DescriptorElement]] = None
 
         # Mapping of a DescriptorElement in our relevancy search index (not the
         #   set that the nn_index uses) to the relevancy score given the
@@ -133,28 +196,32 @@ class IqrSession ():
         # This is None before any initialization or refinement occurs.
         self.results: Optional[Dict[DescriptorElement, float]] = None
 
-        # List of UID's representing the descriptors that we recommend for
-        #   adjudicationfeedback.
+        # Tuple of UID's representing the working set descriptors that we
+        #   recommend for adjudication feedback, in order of most to least
+        #   useful.
         # This is None before any initialization or refinement occurs.
-        self.feedback_list: Optional[Sequence[DescriptorElement]] = None
+        self.feedback_list: Optional[Tuple[Hashable, ...]] = None
+        # Feedback descriptor elements resolved from ``feedback_list`` on
+        #   first request.
+        self._feedback_resolved: Optional[Tuple[DescriptorElement, ...]] = None
 
         # Cache variables for views of refinement results.
-        # All results as a list in order of relevancy score.
+        # All results as a tuple in order of relevancy score.
         self._ordered_results: Optional[
-            Sequence[Tuple[DescriptorElement, float]]
+            Tuple[Tuple[DescriptorElement, float], ...]
         ] = None
         #: Positively adjudicated descriptors in order of relevancy score.
         self._ordered_pos: Optional[
-            Sequence[Tuple[DescriptorElement, float]]
+            Tuple[Tuple[DescriptorElement, float], ...]
         ] = None
         # Negatively adjudicated descriptors in order of relevancy score.
         self._ordered_neg: Optional[
-            Sequence[Tuple[DescriptorElement, float]]
+            Tuple[Tuple[DescriptorElement, float], ...]
         ] = None
         # Non-adjudicated descriptors in our working set in order of
         # relevancy score.
         self._ordered_non_adj: Optional[
-            Sequence[Tuple[DescriptorElement, float]]
+            Tuple[Tuple[DescriptorElement, float], ...]
         ] = None
 
         #
@@ -198,13 +265,17 @@ class IqrSession ():
         """
         positive = set(positive)
         negative = set(negative)
-        with self.lock:
+        with self.lock.write_lock():
             self.external_positive_descriptors.update(positive)
             self.external_positive_descriptors.difference_update(negative)
 
             self.external_negative_descriptors.update(negative)
             self.external_negative_descriptors.difference_update(positive)
 
+            if positive or negative:
+                self._pos_union_cache = self._neg_union_cache = None
+                self._state_generation += 1
+
     def adjudicate(
         self,
         new_positives: Iterable[DescriptorElement] = (),
@@ -246,29 +317,110 @@ class IqrSession ():
         new_negatives = set(new_negatives)
         un_positives = set(un_positives)
         un_negatives = set(un_negatives)
-
-        with self.lock:
-            pos_before = set(self.positive_descriptors)
-            self.positive_descriptors.update(new_positives)
-            self.positive_descriptors.difference_update(un_positives)
-            self.positive_descriptors.difference_update(new_negatives)
-            pos_changed = pos_before != self.positive_descriptors
+        if not (new_positives or new_negatives or un_positives or
+                un_negatives):
+            return
+
+        with self.lock.write_lock():
+            pos_changed = self._apply_adjudication(
+                self.positive_descriptors, new_positives,
+                un_positives | new_negatives
+            )
             if pos_changed:
                 # Reset ordered positives cache if pos adjudications changed.
                 self._ordered_pos = None
+                self._pos_union_cache = None
 
-            neg_before = set(self.negative_descriptors)
-            self.negative_descriptors.update(new_negatives)
-            self.negative_descriptors.difference_update(un_negatives)
-            self.negative_descriptors.difference_update(new_positives)
-            neg_changed = neg_before != self.negative_descriptors
+            neg_changed = self._apply_adjudication(
+                self.negative_descriptors, new_negatives,
+                un_negatives | new_positives
+            )
             if neg_changed:
                 # Reset ordered negatives cache if neg adjudications changed.
                 self._ordered_neg = None
+                self._neg_union_cache = None
 
             if pos_changed or neg_changed:
                 # Reset non-adjudicated cache if anything changed.
                 self._ordered_non_adj = None
+                self._state_generation += 1
+
+    @staticmethod
+    def _apply_adjudication(
+        target: Set[DescriptorElement],
+        add: AbstractSet[DescriptorElement],
+        remove: AbstractSet[DescriptorElement]
+    ) -> bool:
+        """
+        Add then remove the given descriptors from the target set in place.
+
+        Only the given (usually small) sets are traversed, so the target set
+        is not copied to detect whether it changed.
+
+        :return: If the target set was modified.
+        """
+        removed = [d for d in remove if d in target]
+        added = [d for d in add if d not in target and d not in remove]
+        target.difference_update(removed)
+        target.update(added)
+        return bool(removed or added)
+
+    def _get_pos_union(self) -> FrozenSet[DescriptorElement]:
+        """
+        Get the union of adjudicated and external positive descriptors,
+        computing and caching it if needed. The lock should be held.
+        """
+        u = self._pos_union_cache
+        if u is None:
+            u = self._pos_union_cache = frozenset(
+                self.positive_descriptors
+            ).union(self.external_positive_descriptors)
+        return u
+
+    def _get_neg_union(self) -> FrozenSet[DescriptorElement]:
+        """
+        Get the union of adjudicated and external negative descriptors,
+        computing and caching it if needed. The lock should be held.
+        """
+        u = self._neg_union_cache
+        if u is None:
+            u = self._neg_union_cache = frozenset(
+                self.negative_descriptors
+            ).union(self.external_negative_descriptors)
+        return u
+
+    def _get_rank_contrib_pos_all(self) -> FrozenSet[DescriptorElement]:
+        """
+        Get the union of positive descriptors that contributed to the current
+        results, computing and caching it if needed. The lock should be held.
+        """
+        u = self._rank_contrib_pos_all
+        if u is None:
+            u = self._rank_contrib_pos_all = \
+                frozenset(self.rank_contrib_pos) | self.rank_contrib_pos_ext
+        return u
+
+    def _get_rank_contrib_neg_all(self) -> FrozenSet[DescriptorElement]:
+        """
+        Get the union of negative descriptors that contributed to the current
+        results, computing and caching it if needed. The lock should be held.
+        """
+        u = self._rank_contrib_neg_all
+        if u is None:
+            u = self._rank_contrib_neg_all = \
+                frozenset(self.rank_contrib_neg) | self.rank_contrib_neg_ext
+        return u
+
+    def _get_rank_contrib_all(self) -> FrozenSet[DescriptorElement]:
+        """
+        Get the union of all descriptors that contributed to the current
+        results, computing and caching it if needed. The lock should be held.
+        """
+        u = self._rank_contrib_all
+        if u is None:
+            u = self._rank_contrib_all = \
+                self._get_rank_contrib_pos_all() | self._get_rank_contrib_neg_all()
+        return u
 
     def update_working_set(self, nn_index: NearestNeighborsIndex) -> None:
         """
@@ -285,30 +437,154 @@ class IqrSession ():
             session to use as a basis for querying.
 
         """
-        pos_examples = (self.external_positive_descriptors |
-                        self.positive_descriptors)
-        if len(pos_examples) == 0:
-            raise RuntimeError("No positive descriptors to query the neighbor "
-                               "index with.")
-
-        # adding to working set
-        self._log.info("Building working set using %d positive examples "
-                       "(%d external, %d adjudicated)",
-                       len(pos_examples),
-                       len(self.external_positive_descriptors),
-                       len(self.positive_descriptors))
-        # TODO: parallel_map and reduce with merge-dict
-        for p in pos_examples:
-            if p.uuid() not in self._wi_seeds_used:
-                self._log.debug("Querying neighbors to: %s", p)
-                self.working_set.add_many_descriptors(
-                    nn_index.nn(p, n=self.pos_seed_neighbors)[0]
+        with self.lock.write_lock():
+            pos_examples = self._get_pos_union()
+            if len(pos_examples) == 0:
+                raise RuntimeError("No positive descriptors to query the "
+                                   "neighbor index with.")
+
+            # adding to working set
+            self._log.info("Building working set using %d positive examples "
+                           "(%d external, %d adjudicated)",
+                           len(pos_examples),
+                           len(self.external_positive_descriptors),
+                           len(self.positive_descriptors))
+            new_positives = [p for p in pos_examples
+                             if p.uuid() not in self._wi_seeds_used]
+            if not new_positives:
+                return
+            if self._log.isEnabledFor(logging.DEBUG):
+                for p in new_positives:
+                    self._log.debug("Querying neighbors to: %s", p)
+
+            def query(p: DescriptorElement) -> Sequence[DescriptorElement]:
+                return nn_index.nn(p, n=self.pos_seed_neighbors)[0]
+
+            # Neighbor queries are I/O bound, so query concurrently when there
+            # is more than one new positive.
+            if len(new_positives) == 1:
+                neighbors: Iterable[Sequence[DescriptorElement]] = \
+                    [query(new_positives[0])]
+            else:
+                neighbors = parallel_map(
+                    query, new_positives,
+                    cores=min(8, len(new_positives)),
+                    use_multiprocessing=False,
+                    ordered=False,
                 )
-                self._wi_seeds_used.add(p.uuid())
+            neighbor_list = list(itertools.chain.from_iterable(neighbors))
+            self.working_set.add_many_descriptors(neighbor_list)
+            self._ws_append(neighbor_list)
+            self._wi_seeds_used.update(p.uuid() for p in new_positives)
+            self._state_generation += 1
+
+    def _ws_append(self, descs: Iterable[DescriptorElement]) -> None:
+        """
+        Append vectors of the given descriptors not yet in the working set
+        matrix as new rows, growing its capacity geometrically as needed.
+        The write lock should be held.
+        """
+        uid_index = self._ws_uid_index
+        new_descs: List[DescriptorElement] = []
+        for d in descs:
+            uid = d.uuid()
+            if uid not in uid_index:
+                uid_index[uid] = self._ws_len + len(new_descs)
+                new_descs.append(d)
+                self._ws_uids.append(uid)
+        if not new_descs:
+            return
+        self._ws_descriptors.extend(new_descs)
+
+        n = self._ws_len
+        n_new = n + len(new_descs)
+        mat = self._ws_matrix
+        if mat is None or n_new > len(mat):
+            v0 = cast(np.ndarray, new_descs[0].vector())
+            if mat is None:
+                mat = np.empty((max(2 * n_new, 16), v0.size), dtype=v0.dtype)
+            else:
+                # Prefix views handed out previously remain valid since the
+                # old buffer is left untouched.
+                grown = np.empty((max(2 * len(mat), n_new), mat.shape[1]),
+                                 dtype=mat.dtype)
+                grown[:n] = mat[:n]
+                mat = grown
+            self._ws_matrix = mat
+        for i, d in enumerate(new_descs, n):
+            mat[i] = d.vector()
+        self._ws_len = n_new
+
+    def _ws_clear(self) -> None:
+        """
+        Drop the working set matrix and row book-keeping. The write lock
+        should be held.
+        """
+        self._ws_matrix = None
+        self._ws_len = 0
+        self._ws_descriptors = []
+        self._ws_uids = []
+        self._ws_uid_index = {}
+
+    def _stack_vectors(self, descs: Sequence[DescriptorElement]) -> np.ndarray:
+        """
+        Stack the vectors of the given descriptors into a single contiguous
+        ``[len(descs), n_feats]`` matrix, in the order given.
+
+        Vectors are cached by descriptor UID on first access so that repeated
+        refinements do not re-fetch them from potentially disk-backed
+        descriptor elements. Vectors not yet cached are retrieved together
+        via ``DescriptorElement.get_many_vectors``, allowing element
+        implementations to batch their retrieval.
+
+        :param descs: Descriptor elements whose vectors are to be stacked.
+
+        :raises ValueError: A descriptor has no vector.
+
+        :return: 2D matrix of descriptor vectors. This has shape ``[0, 0]``
+            when no descriptors are given.
+        """
+        if not len(descs):
+            return np.empty((0, 0))
+        # This may run without the session lock held, so vectors are gathered
+        # locally instead of being read back from the shared cache, which
+        # ``reset`` may replace meanwhile.
+        cache = self._vector_cache
+        uids = [d.uuid() for d in descs]
+        found: Dict[Hashable, np.ndarray] = {}
+        missing: Dict[Hashable, DescriptorElement] = {}
+        for uid, d in zip(uids, descs):
+            if uid in found or uid in missing:
+                continue
+            v = cache.get(uid)
+            if v is None:
+                missing[uid] = d
+            else:
+                found[uid] = v
+        vectors: Sequence[Optional[np.ndarray]] = ()
+        if len(missing) == 1:
+            ((uid, d),) = missing.items()
+            vectors = [d.vector()]
+        elif missing:
+            vectors = DescriptorElement.get_many_vectors(missing.values())
+        for uid, v in zip(missing, vectors):
+            if v is None:
+                raise ValueError("Descriptor '%s' has no vector." % uid)
+            found[uid] = cache[uid] = v
+        v = found[uids[0]]
+        out = np.empty((len(descs), v.size), dtype=v.dtype)
+        for i, uid in enumerate(uids):
+            out[i] = found[uid]
+        return out
 
     def refine(self) -> None:
         """ Refine current model results based on current adjudication state
 
+        Ranking is performed on a snapshot of the session state without
+        holding the session lock. If adjudications or the working set change
+        before ranking completes, the now stale results are discarded and the
+        previous results are left in place.
+
         :raises RuntimeError: No working set has been initialized.
             :meth:`update_working_set` should have been called after
             adjudicating some positive examples.
@@ -316,112 +592,170 @@ class IqrSession ():
             have at least one positive adjudication.
 
         """
-        with self.lock:
-            # Combine pos/neg adjudications + added external data descriptors
-            pos = [desc.vector() for desc in (self.positive_descriptors |
-                                              self.external_positive_descriptors)]
-            neg = [desc.vector() for desc in (self.negative_descriptors |
-                                              self.external_negative_descriptors)]
-
-            if not pos:
-                raise RuntimeError("Did not find at least one positive "
-                                   "adjudication.")
-
-            # Get working set descriptors
-            pool_uids, pool_de = zip(*self.working_set.items())
-            pool = [de.vector() for de in pool_de]
-            pool_mat = np.asarray(pool)
-            pool_de_mat = np.asarray(pool_de)
-
-            # Auto-select negative examples if none are given
-            if not neg:
-                neg_autoselect = set()
-                self._log.info(f"Auto-selecting negative examples. "
-                               f"({self.autoneg_select_ratio} per positive)")
-
-                # For each positive example, find the farthest descriptor
-                # from it to use as a negative example
-                for p in pos:
-                    # Compute distance between current positive example and
-                    # each of the working set descriptors
-                    np_distances = self.distance_metric(p, pool_mat)
-
-                    # get array of the indices of the K maximally distant elements where
-                    # `K = autoneg_select_ratio` and `K >= 1.`
-                    part_size: int = self.autoneg_select_ratio
-                    max_indices: Sequence[int] = np.argpartition(np_distances, -part_size)[-part_size:]
-
-                    neg_autoselect.update(pool_de_mat[max_indices])
-
-                self._log.debug(f"Auto-selected negative descriptors (before difference update) "
-                                f"[{len(neg_autoselect)}]: {neg_autoselect}")
-
-                # Remove any positive examples from auto-selected results
-                neg_autoselect.difference_update((self.positive_descriptors |
-                                                  self.external_positive_descriptors))
-
-                self._log.debug(f"Auto-selected negative descriptors (after difference update) "
-                                f"[{len(neg_autoselect)}]: {neg_autoselect}")
-
-                if not neg_autoselect:
-                    raise RuntimeError("Negative auto-selection failed. "
-                                       "Did not select any negative examples.")
-
-                for n in neg_autoselect:
-                    neg.append(n.vector())
-
-            # Rank the working set descriptors
-            self._log.debug("Ranking working set with %d pos and %d neg total "
-                            "examples.", len(pos), len(neg))
-            probabilities, feedback_uuids = self.rank_relevancy_with_feedback.rank_with_feedback(
-                pos, neg, pool, pool_uids)
-            self.results = dict(zip(self.working_set.iterdescriptors(), probabilities))
-            self.feedback_list = [*self.working_set.get_many_descriptors(feedback_uuids)]
+        # Snapshot the adjudication state and working set under the lock,
+        # then release it for the heavy vector fetching and ranking so other
+        # session operations are not blocked meanwhile.
+        with self.lock.write_lock():
+            generation = self._state_generation
+            pos_descriptors = self._get_pos_union()
+            neg_descriptors = self._get_neg_union()
+            if self._ws_len != len(self.working_set):
+                # The working set was modified directly, resynchronize.
+                self._ws_clear()
+                self._ws_append(self.working_set.descriptors())
+            # Matrix rows up to ``_ws_len`` are never modified, so a view is a
+            # consistent snapshot.
+            n = self._ws_len
+            pool = self._ws_matrix[:n] if self._ws_matrix is not None \
+                else np.empty((0, 0))
+            pool_de = self._ws_descriptors[:n]
+            pool_uids = tuple(self._ws_uids[:n])
+            rank_relevancy_with_feedback = self.rank_relevancy_with_feedback
+
+        # Combine pos/neg adjudications + added external data descriptors
+        pos = self._stack_vectors(list(pos_descriptors))
+        neg = self._stack_vectors(list(neg_descriptors))
+
+        if not len(pos):
+            raise RuntimeError("Did not find at least one positive "
+                               "adjudication.")
+
+        if not n:
+            raise RuntimeError("No working set has been initialized.")
+        pool_de_mat = np.asarray(pool_de)
+
+        # Auto-select negative examples if none are given
+        if not len(neg):
+            neg_autoselect = set()
+            self._log.info("Auto-selecting negative examples. "
+                           "(%d per positive)", self.autoneg_select_ratio)
+
+            # For each positive example, find the farthest descriptor
+            # from it to use as a negative example
+            for p in pos:
+                # Compute distance between current positive example and
+                # each of the working set descriptors
+                np_distances = self.distance_metric(p, pool)
+
+                # get array of the indices of the K maximally distant elements where
+                # `K = autoneg_select_ratio` and `K >= 1.`
+                part_size: int = self.autoneg_select_ratio
+                max_indices: Sequence[int] = np.argpartition(np_distances, -part_size)[-part_size:]
+
+                neg_autoselect.update(pool_de_mat[max_indices])
+
+            self._log.debug("Auto-selected negative descriptors (before difference update) "
+                            "[%d]: %s", len(neg_autoselect), neg_autoselect)
+
+            # Remove any positive examples from auto-selected results
+            neg_autoselect.difference_update(pos_descriptors)
+
+            self._log.debug("Auto-selected negative descriptors (after difference update) "
+                            "[%d]: %s", len(neg_autoselect), neg_autoselect)
+
+            if not neg_autoselect:
+                raise RuntimeError("Negative auto-selection failed. "
+                                   "Did not select any negative examples.")
+
+            neg = self._stack_vectors(list(neg_autoselect))
+
+        # Rank the working set descriptors
+        self._log.debug("Ranking working set with %d pos and %d neg total "
+                        "examples.", len(pos), len(neg))
+        # - 2D matrices are sequences of row vectors for the ranker.
+        probabilities, feedback_uuids = rank_relevancy_with_feedback.rank_with_feedback(
+            pos, neg, pool, pool_uids)  # type: ignore
+        results = dict(zip(pool_de, probabilities))
+        # Feedback descriptors are only resolved when requested.
+        feedback_list = tuple(feedback_uuids)
+
+        with self.lock.write_lock():
+            if self._state_generation != generation:
+                # Adjudications or the working set changed while ranking, so
+                # these results no longer reflect the session state.
+                self._log.info("Session state changed during refinement, "
+                               "discarding stale results.")
+                return
+            self.results = results
+            self.feedback_list = feedback_list
+            self._feedback_resolved = None
 
             # Record UIDs of elements used for relevancy ranking.
-            # - shallow copy for separate container instance
-            self.rank_contrib_pos = set(self.positive_descriptors)
-            self.rank_contrib_pos_ext = set(self.external_positive_descriptors)
-            self.rank_contrib_neg = set(self.negative_descriptors)
-            self.rank_contrib_neg_ext = set(self.external_negative_descriptors)
+            # - The unchanged generation means adjudications still match the
+            #   snapshot, so frozen copies are taken from the live sets and the
+            #   snapshot unions are reused.
+            self.rank_contrib_pos = frozenset(self.positive_descriptors)
+            self.rank_contrib_pos_ext = frozenset(self.external_positive_descriptors)
+            self.rank_contrib_neg = frozenset(self.negative_descriptors)
+            self.rank_contrib_neg_ext = frozenset(self.external_negative_descriptors)
+            self._rank_contrib_pos_all = pos_descriptors
+            self._rank_contrib_neg_all = neg_descriptors
+            self._rank_contrib_all = pos_descriptors | neg_descriptors
             # Clear result view caches
             self._ordered_results = self._ordered_pos = self._ordered_neg = \
                 self._ordered_non_adj = None
 
-    def ordered_results(self) -> List[Tuple[DescriptorElement, float]]:
+    # Minimum number of results for which ``ordered_results`` sorts scores
+    # with numpy instead of ``sorted``.
+    ORDERED_RESULTS_ARGSORT_MIN = 4096
+
+    def ordered_results(
+        self, k: Optional[int] = None
+    ) -> Tuple[Tuple[DescriptorElement, float], ...]:
         """
         Return a tuple of all working-set descriptor elements as tuples of
         ``(element, score)`` in order of descending relevancy score.
 
         If refinement has not yet occurred since session creation or the last
         reset, an empty tuple is returned.
-        """
-        with self.lock:
-            try:
-                return list(cast(List, self._ordered_results))
-            except TypeError:
-                # NoneType is not iterable
-                # Cache did non exist.
-                if self.results is None:
-                    # NoneType missing items/iteritems attr
-                    # No results to iterate over.
-                    return list()
-
-                result_items = self.results.items()
-                r = self._ordered_results = cast(
-                    List[Tuple[DescriptorElement, float]],
-                    sorted(
-                        result_items,
-                        key=lambda p: p[1], reverse=True
-                    )
-                )
-                # Shallow copy of the list to protect against external mutation
-                return list(r)
 
-    def feedback_results(self) -> List[DescriptorElement]:
+        :param k: Optionally only return the ``k`` highest scoring elements.
+            If the full ordering is not cached yet, the top ``k`` elements are
+            selected without sorting all results and the cache is not
+            populated.
+
+        :raises ValueError: ``k`` is negative.
         """
-        Return a list of all working-set descriptor elements that would benefit
-        from further refinement. The list is in order of most to least useful.
+        _check_k(k)
+        with self.lock.read_lock():
+            r = self._ordered_results
+            results = self.results
+        if r is not None:
+            return r if k is None else r[:k]
+        # Cache did not exist.
+        if results is None:
+            # No results to iterate over.
+            return ()
+        # Order outside of the lock as ``results`` is only ever replaced,
+        # never mutated, by refinement.
+        if k is not None:
+            return tuple(heapq.nlargest(k, results.items(),
+                                        key=operator.itemgetter(1)))
+        if len(results) < self.ORDERED_RESULTS_ARGSORT_MIN:
+            r = tuple(sorted(results.items(), key=operator.itemgetter(1),
+                             reverse=True))
+        else:
+            # Stable sort of negated scores matches the ``sorted`` ordering,
+            # including ties, while sorting in C.
+            items = list(results.items())
+            scores = np.fromiter((sc for _, sc in items), dtype=np.float64,
+                                 count=len(items))
+            order = np.argsort(-scores, kind='stable')
+            r = tuple(items[i] for i in order)
+        with self.lock.write_lock():
+            # Only publish if a refine/reset did not occur meanwhile.
+            if self.results is results:
+                self._ordered_results = r
+        return r
+
+    def feedback_results(self) -> Tuple[DescriptorElement, ...]:
+        """
+        Return a tuple of all working-set descriptor elements that would
+        benefit from further refinement. The tuple is in order of most to least
+        useful.
+
+        Descriptor elements are resolved from the working set by the UIDs in
+        ``feedback_list`` on the first call after a refinement.
 
         If refinement has not yet occurred since session creation or the last
         reset, an empty tuple is returned.
@@ -429,112 +763,191 @@ class IqrSession ():
         :raises RuntimeError: If the end of the function is reached this means
             the feedback results have gotten into an invalid state.
         """
-        with self.lock:
+        with self.lock.read_lock():
+            resolved = self._feedback_resolved
+            if resolved is not None:
+                return resolved
+            feedback_list = self.feedback_list
             try:
-                return list(cast(List, self.feedback_list))
+                resolved = tuple(self.working_set.get_many_descriptors(
+                    cast(Iterable, feedback_list)
+                ))
             except TypeError:
                 # NoneType is not iterable
                 # Cache did non exist.
-                if self.feedback_list is None:
-                    # NoneType missing items/iteritems attr
+                if feedback_list is None:
                     # No results to iterate over.
-                    return list()
+                    return ()
+        if resolved is not None:
+            with self.lock.write_lock():
+                # Only publish if a refine/reset did not occur meanwhile.
+                if self.feedback_list is feedback_list:
+                    self._feedback_resolved = resolved
+            return resolved
 
         # Error out since this case should not be reachable
         raise RuntimeError("Feedback results in an invalid state.")
 
-    def get_positive_adjudication_relevancy(self) -> List[Tuple[DescriptorElement, float]]:
+    def _recompute_ordered_partitions(self) -> Tuple[
+        Tuple[Tuple[DescriptorElement, float], ...],
+        Tuple[Tuple[DescriptorElement, float], ...],
+        Tuple[Tuple[DescriptorElement, float], ...]
+    ]:
+        """
+        Compute the positive, negative and non-adjudicated result views in a
+        single pass over ``ordered_results``.
+
+        The views are published to the ``_ordered_pos``, ``_ordered_neg`` and
+        ``_ordered_non_adj`` caches under a brief write lock only if
+        ``results`` has not been replaced by a refinement or reset while
+        computing.
+
+        :return: Tuple of the positive, negative and non-adjudicated views.
+        """
+        with self.lock.read_lock():
+            results = self.results
+            # Union sets are constant until the next refine.
+            pos_all = self._get_rank_contrib_pos_all()
+            neg_all = self._get_rank_contrib_neg_all()
+        ordered_pos: List[Tuple[DescriptorElement, float]] = []
+        ordered_neg: List[Tuple[DescriptorElement, float]] = []
+        ordered_non_adj: List[Tuple[DescriptorElement, float]] = []
+        # Results already ordered, so only partition.
+        # - An external adjudication may overlap an opposite working set
+        #   adjudication, so an element may be in both the pos and neg views.
+        for t in self.ordered_results():
+            d = t[0]
+            if d in pos_all:
+                ordered_pos.append(t)
+                if d in neg_all:
+                    ordered_neg.append(t)
+            elif d in neg_all:
+                ordered_neg.append(t)
+            else:
+                ordered_non_adj.append(t)
+        views = (tuple(ordered_pos), tuple(ordered_neg),
+                 tuple(ordered_non_adj))
+        with self.lock.write_lock():
+            if self.results is results:
+                self._ordered_pos, self._ordered_neg, self._ordered_non_adj = \
+                    views
+        return views
+
+    @staticmethod
+    def _select_top_k(
+        results: Optional[Dict[DescriptorElement, float]], k: int,
+        members: AbstractSet[DescriptorElement], exclude: bool = False
+    ) -> Tuple[Tuple[DescriptorElement, float], ...]:
         """
-        Return a list of the positively adjudicated descriptors as tuples of
+        Select the ``k`` highest scoring ``results`` items whose element is in
+        ``members`` (or not in, if ``exclude`` is true), in descending order,
+        without sorting all results.
+        """
+        if results is None:
+            return ()
+        if exclude:
+            items = (t for t in results.items() if t[0] not in members)
+        else:
+            items = (t for t in results.items() if t[0] in members)
+        return tuple(heapq.nlargest(k, items, key=operator.itemgetter(1)))
+
+    def get_positive_adjudication_relevancy(
+        self, k: Optional[int] = None
+    ) -> Tuple[Tuple[DescriptorElement, float], ...]:
+        """
+        Return a tuple of the positively adjudicated descriptors as tuples of
         ``(element, score)`` in order of descending relevancy score.
 
         This does *not* include external positive adjudications, only
         positively adjudicated descriptors in the working set.
 
         If refinement has not yet occurred since session creation or the last
-        reset, an empty list is returned.
+        reset, an empty tuple is returned.
 
         Cache is invalidated when:
         - A refinement occurs.
         - Positive adjudications change.
 
-        """
-        with self.lock:
-            try:
-                return list(cast(List, self._ordered_pos))
-            except TypeError:
-                # NoneType is not iterable
-                # No cache yet.
-
-                rank_contrib_pos = \
-                    self.rank_contrib_pos | self.rank_contrib_pos_ext
-                # Results already ordered, so only filter
-                r = self._ordered_pos = list(
-                    filter(lambda t: t[0] in rank_contrib_pos,
-                           self.ordered_results())
-                )
-                # Shallow copy of the list to protect against external mutation
-                return list(r)
+        :param k: Optionally only return the ``k`` highest scoring elements.
+            If not cached yet, these are selected without populating the
+            cache.
 
-    def get_negative_adjudication_relevancy(self) -> List[Tuple[DescriptorElement, float]]:
+        :raises ValueError: ``k`` is negative.
+        """
+        _check_k(k)
+        with self.lock.read_lock():
+            r = self._ordered_pos
+            if r is not None:
+                return r if k is None else r[:k]
+            # No cache yet.
+            rank_contrib_pos = self._get_rank_contrib_pos_all()
+            results = self.results
+        if k is None:
+            return self._recompute_ordered_partitions()[0]
+        return self._select_top_k(results, k, rank_contrib_pos)
+
+    def get_negative_adjudication_relevancy(
+        self, k: Optional[int] = None
+    ) -> Tuple[Tuple[DescriptorElement, float], ...]:
         """
-        Return a list of the negatively adjudicated descriptors as tuples of
+        Return a tuple of the negatively adjudicated descriptors as tuples of
         ``(element, score)`` in order of descending relevancy score.
 
         This does *not* include external negative adjudications, only
         negatively adjudicated descriptors in the working set.
 
         If refinement has not yet occurred since session creation or the last
-        reset, an empty list is returned.
+        reset, an empty tuple is returned.
 
         Cache is invalidated when:
         - A refinement occurs.
         - Negative adjudications change.
 
-        """
-        with self.lock:
-            try:
-                return list(cast(List, self._ordered_neg))
-            except TypeError:
-                # NoneType is not iterable
-                # No cache yet.
-
-                rank_contrib_neg = \
-                    self.rank_contrib_neg | self.rank_contrib_neg_ext
-                # Results already ordered, so only filter
-                r = self._ordered_neg = list(
-                    filter(lambda t: t[0] in rank_contrib_neg,
-                           self.ordered_results())
-                )
-                # Shallow copy of the list to protect against external mutation
-                return list(r)
+        :param k: Optionally only return the ``k`` highest scoring elements.
+            If not cached yet, these are selected without populating the
+            cache.
 
-    def get_unadjudicated_relevancy(self) -> List[Tuple[DescriptorElement, float]]:
+        :raises ValueError: ``k`` is negative.
+        """
+        _check_k(k)
+        with self.lock.read_lock():
+            r = self._ordered_neg
+            if r is not None:
+                return r if k is None else r[:k]
+            # No cache yet.
+            rank_contrib_neg = self._get_rank_contrib_neg_all()
+            results = self.results
+        if k is None:
+            return self._recompute_ordered_partitions()[1]
+        return self._select_top_k(results, k, rank_contrib_neg)
+
+    def get_unadjudicated_relevancy(
+        self, k: Optional[int] = None
+    ) -> Tuple[Tuple[DescriptorElement, float], ...]:
         """
-        Return a list of the non-adjudicated descriptor elements as tuples of
+        Return a tuple of the non-adjudicated descriptor elements as tuples of
         ``(element, score)`` in order of descending relevancy score.
 
         If refinement has not yet occurred since session creation or the last
-        reset, an empty list is returned.
+        reset, an empty tuple is returned.
+
+        :param k: Optionally only return the ``k`` highest scoring elements.
+            If not cached yet, these are selected without populating the
+            cache.
 
+        :raises ValueError: ``k`` is negative.
         """
-        with self.lock:
-            try:
-                return list(cast(List, self._ordered_non_adj))
-            except TypeError:
-                # NoneType is not iterable
-                # No cache yet
-                pos_and_neg = \
-                    self.rank_contrib_pos | self.rank_contrib_pos_ext | \
-                    self.rank_contrib_neg | self.rank_contrib_neg_ext
-
-                # Results already ordered, so only filter
-                r = self._ordered_non_adj = list(
-                    filter(lambda t: t[0] not in pos_and_neg,
-                           self.ordered_results())
-                )
-                # Shallow copy of the list to protect against external mutation
-                return list(r)
+        _check_k(k)
+        with self.lock.read_lock():
+            r = self._ordered_non_adj
+            if r is not None:
+                return r if k is None else r[:k]
+            # No cache yet
+            pos_and_neg = self._get_rank_contrib_all()
+            results = self.results
+        if k is None:
+            return self._recompute_ordered_partitions()[2]
+        return self._select_top_k(results, k, pos_and_neg, exclude=True)
 
     def reset(self) -> None:
         """ Reset the IQR Search state
@@ -542,20 +955,29 @@ class IqrSession ():
         No positive adjudications, reload original feature data
 
         """
-        with self.lock:
+        with self.lock.write_lock():
+            self._state_generation += 1
             self.working_set.clear()
+            self._ws_clear()
+            # Replaced rather than cleared as an unlocked ``refine`` may still
+            # be filling the previous cache.
+            self._vector_cache = {}
             self._wi_seeds_used.clear()
             self.positive_descriptors.clear()
             self.negative_descriptors.clear()
             self.external_positive_descriptors.clear()
             self.external_negative_descriptors.clear()
-            self.rank_contrib_pos.clear()
-            self.rank_contrib_pos_ext.clear()
-            self.rank_contrib_neg.clear()
-            self.rank_contrib_neg_ext.clear()
+            self.rank_contrib_pos = frozenset()
+            self.rank_contrib_pos_ext = frozenset()
+            self.rank_contrib_neg = frozenset()
+            self.rank_contrib_neg_ext = frozenset()
+            self._pos_union_cache = self._neg_union_cache = None
+            self._rank_contrib_pos_all = self._rank_contrib_neg_all = \
+                self._rank_contrib_all = None
 
             self.results = None
             self.feedback_list = None
+            self._feedback_resolved = None
             self._ordered_results = self._ordered_pos = self._ordered_neg = \
                 self._ordered_non_adj = None
 
@@ -565,6 +987,49 @@ class IqrSession ():
     # I/O Constants. These should not be changed.
     STATE_ZIP_COMPRESSION = zipfile.ZIP_DEFLATED
     STATE_ZIP_FILENAME = "iqr_state.json"
+    # Version of the state format written by ``get_state_bytes``.
+    # - Version 1 (no "version" key) encoded vectors as JSON lists.
+    # - Version 2 stores only UIDs in the JSON file with vectors stored as
+    #   uncompressed ``.npy`` matrix entries in the same ZIP archive, parallel
+    #   to the UID lists.
+    STATE_VERSION = 2
+    STATE_NPY_COMPRESSION = zipfile.ZIP_STORED
+    # State keys of the descriptor sets, also naming their ``.npy`` entries.
+    _STATE_SET_KEYS = ('pos', 'neg', 'external_pos', 'external_neg')
+
+    def _snapshot_state(self) -> Dict[str, List[DescriptorElement]]:
+        """
+        Snapshot the descriptor sets recorded in state bytes, mapping each of
+        ``_STATE_SET_KEYS`` to a list of descriptor elements.
+
+        Only the brief copy happens under the session read lock.
+        """
+        with self.lock.read_lock():
+            return dict(zip(self._STATE_SET_KEYS, (
+                list(self.positive_descriptors),
+                list(self.negative_descriptors),
+                list(self.external_positive_descriptors),
+                list(self.external_negative_descriptors),
+            )))
+
+    def _serialize_snapshot(
+        self, snapshot: Dict[str, List[DescriptorElement]]
+    ) -> bytes:
+        """
+        Serialize a snapshot from ``_snapshot_state`` into state bytes. This
+        does not require the session lock.
+        """
+        state: Dict[str, object] = {'version': self.STATE_VERSION}
+        z_buffer = io.BytesIO()
+        with zipfile.ZipFile(z_buffer, 'w', self.STATE_NPY_COMPRESSION) as z:
+            for key, d_list in snapshot.items():
+                state[key] = [d.uuid() for d in d_list]
+                with z.open(key + '.npy', 'w') as f:
+                    np.save(f, self._stack_vectors(d_list),
+                            allow_pickle=False)
+            z.writestr(self.STATE_ZIP_FILENAME, json_dumps(state),
+                       compress_type=self.STATE_ZIP_COMPRESSION)
+        return z_buffer.getvalue()
 
     def get_state_bytes(self) -> bytes:
         """
@@ -574,33 +1039,30 @@ class IqrSession ():
         This does not encode current results or the relevancy index's state, but
         these can be reproduced with this state.
 
+        The state is a ZIP archive containing the ``STATE_ZIP_FILENAME`` JSON
+        file, recording the format version and descriptor UIDs, plus one
+        ``.npy`` vector matrix per descriptor set.
+
         :return: State representation bytes
 
         """
-        def d_set_to_list(
-            d_set: Set[DescriptorElement]
-        ) -> List[Tuple[Hashable, str, List[float]]]:
-            # Convert set of descriptors to list of tuples:
-            #   [..., (uuid, vector), ...]
-            return [(d.uuid(), d.vector().tolist()) for d in d_set]  # type: ignore
+        return self._serialize_snapshot(self._snapshot_state())
+
+    def get_state_bytes_async(self, executor: Executor) -> "Future[bytes]":
+        """
+        Like ``get_state_bytes`` but with serialization performed by the given
+        executor.
 
-        with self:
-            # Convert session descriptors into basic values.
-            pos_d = d_set_to_list(self.positive_descriptors)
-            neg_d = d_set_to_list(self.negative_descriptors)
-            ext_pos_d = d_set_to_list(self.external_positive_descriptors)
-            ext_neg_d = d_set_to_list(self.external_negative_descriptors)
+        The session state is snapshot before this method returns, so later
+        modifications to this session are not reflected in the result.
 
-        z_buffer = io.BytesIO()
-        z = zipfile.ZipFile(z_buffer, 'w', self.STATE_ZIP_COMPRESSION)
-        z.writestr(self.STATE_ZIP_FILENAME, json.dumps({
-            'pos': pos_d,
-            'neg': neg_d,
-            'external_pos': ext_pos_d,
-            'external_neg': ext_neg_d,
-        }))
-        z.close()
-        return z_buffer.getvalue()
+        :param executor: Executor to submit the serialization work to.
+
+        :return: Future of the state representation bytes.
+
+        """
+        return executor.submit(self._serialize_snapshot,
+                               self._snapshot_state())
 
     def set_state_bytes(
         self, b: bytes, descriptor_factory: DescriptorElementFactory
@@ -610,7 +1072,9 @@ class IqrSession ():
         this session in the process.
 
         Bytes given must have been retrieved via a previous call to
-        ``get_state_bytes`` otherwise this method will fail.
+        ``get_state_bytes`` otherwise this method will fail. States written by
+        previous versions, with vectors encoded into the JSON file, are still
+        accepted.
 
         Since this state may be completely different from the current state,
         this session is reset before applying the new state. Thus, any current
@@ -631,30 +1095,53 @@ class IqrSession ():
                              "zipped file name.")
 
         # Extract expected json file object
-        state = json.loads(z.read(self.STATE_ZIP_FILENAME).decode())
+        state = cast(Dict, json_loads(z.read(self.STATE_ZIP_FILENAME)))
+        version = state.get('version', 1)
+        if version > self.STATE_VERSION:
+            raise ValueError("Unsupported state version %s (maximum %d)."
+                             % (version, self.STATE_VERSION))
+
+        # Pair each UID with its vector for each descriptor set.
+        sources: Dict[str, Iterable[Tuple[Hashable, Sequence[float]]]] = {}
+        for key in self._STATE_SET_KEYS:
+            if version >= 2:
+                try:
+                    f = z.open(key + '.npy')
+                except KeyError:
+                    raise ValueError("Invalid bytes given, missing vector "
+                                     "entry for state '%s'." % key)
+                with f:
+                    mat = np.load(f, allow_pickle=False)
+                uids = state[key]
+                if len(uids) != len(mat):
+                    raise ValueError("State '%s' UIDs and vectors are of "
+                                     "different length." % key)
+                sources[key] = zip(uids, mat)
+            else:
+                sources[key] = state[key]
         del z, z_buffer
 
-        with self:
+        with self.lock.write_lock():
             self.reset()
 
             def load_descriptor(
-                _uid: Hashable, vec_list: List[float]
+                _uid: Hashable, vec: Sequence[float]
             ) -> DescriptorElement:
                 _e = descriptor_factory.new_descriptor(_uid)
                 if _e.has_vector():
-                    assert _e.vector().tolist() == vec_list, "Found existing vector for UUID '%s' but vectors did not match."  # type: ignore  # noqa: E501
+                    assert np.array_equal(_e.vector(), vec), "Found existing vector for UUID '%s' but vectors did not match."  # type: ignore  # noqa: E501
                 else:
-                    _e.set_vector(np.array(vec_list))
+                    _e.set_vector(np.array(vec))
                 return _e
 
             # Read in raw descriptor data from the state, convert to descriptor
             # element, then store in our descriptor sets.
-            for source, target in [(state['external_pos'],
+            for source, target in [(sources['external_pos'],
                                     self.external_positive_descriptors),
-                                   (state['external_neg'],
+                                   (sources['external_neg'],
                                     self.external_negative_descriptors),
-                                   (state['pos'], self.positive_descriptors),
-                                   (state['neg'], self.negative_descriptors)]:
-                for uid, vector_list in source:
-                    e = load_descriptor(uid, vector_list)
+                                   (sources['pos'], self.positive_descriptors),
+                                   (sources['neg'], self.negative_descriptors)]:
+                for uid, vec in source:
+                    e = load_descriptor(uid, vec)
                     target.add(e)
@@ -0,0 +1,46 @@
+"""
+JSON encoding and decoding using ``orjson`` when it is installed, falling back
+to the standard library ``json`` module otherwise.
+"""
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
+# Leading messages of ``orjson`` encoding errors for values that the standard
+# library json module does support, for which encoding is retried with it.
+_STDLIB_FALLBACK_ERRORS = (
+    "Integer exceeds 64-bit range",
+    "Dict key must be str",
+)
+
+
+def json_dumps(obj: object) -> bytes:
+    """
+    Serialize ``obj`` to UTF-8 JSON bytes, using ``orjson`` when available.
+
+    Objects ``orjson`` cannot encode but the standard library json module can,
+    i.e. integers beyond 64-bit and non-string dictionary keys, are encoded
+    with the latter.
+
+    :raises TypeError: ``obj`` is not JSON serializable.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except TypeError as ex:
+            if not str(ex).startswith(_STDLIB_FALLBACK_ERRORS):
+                raise
+    return json.dumps(obj).encode()
+
+
+def json_loads(b: Union[bytes, str]) -> Any:
+    """
+    Deserialize UTF-8 JSON bytes or text, using ``orjson`` when available.
+    """
+    if orjson is not None:
+        return orjson.loads(b)
+    return json.loads(b)
@@ -0,0 +1,143 @@
+import contextlib
+import threading
+from types import TracebackType
+from typing import Dict, Iterator, Optional
+
+
+class RWLock (object):
+    """
+    Re-entrant, writer-preferring reader/writer lock.
+
+    Any number of threads may hold the read lock concurrently, while the write
+    lock is exclusive. Threads waiting on the write lock block new readers
+    from entering so that writers are not starved under a steady read load.
+
+    Both locks are re-entrant for the owning thread, and a thread holding the
+    write lock may also acquire the read lock. A thread holding only the read
+    lock may *not* upgrade to the write lock as this could deadlock against
+    another upgrading reader, so a ``RuntimeError`` is raised instead.
+
+    For compatibility with ``threading.RLock`` usage, ``acquire``/``release``
+    and the with-statement operate on the write lock.
+
+    """
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition(threading.Lock())
+        # Mapping of reader thread ident to its re-entrant read depth.
+        self._readers: Dict[int, int] = {}
+        # Ident of the thread currently holding the write lock, if any.
+        self._writer: Optional[int] = None
+        self._write_depth = 0
+        self._writers_waiting = 0
+
+    def acquire_read(self) -> None:
+        """
+        Acquire the read lock, blocking while another thread holds or waits
+        for the write lock.
+        """
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me or me in self._readers:
+                # Re-entrant acquisition must not wait on pending writers or
+                # we would deadlock against ourselves.
+                self._readers[me] = self._readers.get(me, 0) + 1
+                return
+            while self._writer is not None or self._writers_waiting:
+                self._cond.wait()
+            self._readers[me] = 1
+
+    def release_read(self) -> None:
+        """
+        Release one level of the read lock held by the current thread.
+
+        :raises RuntimeError: The current thread does not hold the read lock.
+        """
+        me = threading.get_ident()
+        with self._cond:
+            depth = self._readers.get(me, 0)
+            if not depth:
+                raise RuntimeError("Cannot release un-acquired read lock.")
+            if depth > 1:
+                self._readers[me] = depth - 1
+            else:
+                del self._readers[me]
+                if not self._readers:
+                    self._cond.notify_all()
+
+    def acquire_write(self) -> None:
+        """
+        Acquire the write lock, blocking until there are no other readers or
+        writers.
+
+        :raises RuntimeError: The current thread holds only the read lock.
+        """
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._write_depth += 1
+                return
+            if me in self._readers:
+                raise RuntimeError("Cannot upgrade a held read lock to a "
+                                   "write lock.")
+            self._writers_waiting += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = me
+            self._write_depth = 1
+
+    def release_write(self) -> None:
+        """
+        Release one level of the write lock held by the current thread.
+
+        :raises RuntimeError: The current thread does not hold the write lock.
+        """
+        with self._cond:
+            if self._writer != threading.get_ident():
+                raise RuntimeError("Cannot release un-acquired write lock.")
+            self._write_depth -= 1
+            if not self._write_depth:
+                self._writer = None
+                self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def read_lock(self) -> Iterator["RWLock"]:
+        """
+        Context manager holding the read lock for the duration of the block.
+        """
+        self.acquire_read()
+        try:
+            yield self
+        finally:
+            self.release_read()
+
+    @contextlib.contextmanager
+    def write_lock(self) -> Iterator["RWLock"]:
+        """
+        Context manager holding the write lock for the duration of the block.
+        """
+        self.acquire_write()
+        try:
+            yield self
+        finally:
+            self.release_write()
+
+    # ``threading.RLock`` compatible interface using the write lock.
+    acquire = acquire_write
+    release = release_write
+
+    def __enter__(self) -> "RWLock":
+        self.acquire_write()
+        return self
+
+    # noinspection PyUnusedLocal
+    def __exit__(
+        self,
+        exc_type: Optional[type],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType]
+    ) -> None:
+        self.release_write()
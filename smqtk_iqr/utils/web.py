@@ -1,7 +1,8 @@
 import time
-from typing import Tuple, Iterable, Union, Any
+from typing import Tuple, Iterable, Union, Any, Optional
 import flask
 import requests
+from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter
 
 from smqtk_core.dict import merge_dict
 
@@ -38,18 +39,31 @@ class ServiceProxy (object):
     Helper class for interacting with an external service.
     """
 
-    def __init__(self, url: str):
+    def __init__(self, url: str, pool_maxsize: Optional[int] = None):
         """
+        Requests are made through a ``requests.Session`` so that connections
+        to the service are kept alive and reused between calls.
+
         Parameters
         ---
             url : str
                 URL to base requests on.
+            pool_maxsize : int, optional
+                Maximum number of connections to keep alive for reuse. This
+                should be at least the number of threads concurrently making
+                requests through this proxy. Defaults to the ``requests``
+                library default when not provided.
         """
         # Append http:// to the head of the URL if neither http(s) are present
         if not (url.startswith('http://') or url.startswith('https://')):
             url = 'http://' + url
         self.url = url
 
+        adapter = HTTPAdapter(pool_maxsize=pool_maxsize or DEFAULT_POOLSIZE)
+        self._session = requests.Session()
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
     def _compose(self, endpoint: str) -> str:
         return '/'.join([self.url, endpoint])
 
@@ -57,22 +71,22 @@ class ServiceProxy (object):
         self, endpoint: str, **params: Union[str, Iterable[str], bytes, None]
     ) -> requests.Response:
         # Make params None if its empty.
-        return requests.get(self._compose(endpoint), params)
+        return self._session.get(self._compose(endpoint), params=params)
 
     def post(
         self, endpoint: str, **params: Union[str, Iterable[str], bytes, None]
     ) -> requests.Response:
         # Make params None if its empty.
-        return requests.post(self._compose(endpoint), data=params)
+        return self._session.post(self._compose(endpoint), data=params)
 
     def put(
         self, endpoint: str, **params: Union[str, Iterable[str], bytes, None]
     ) -> requests.Response:
         # Make params None if its empty.
-        return requests.put(self._compose(endpoint), data=params)
+        return self._session.put(self._compose(endpoint), data=params)
 
     def delete(
         self, endpoint: str, **params: Union[str, Iterable[str], bytes, None]
     ) -> requests.Response:
         # Make params None if its empty.
-        return requests.delete(self._compose(endpoint), params=params)
+        return self._session.delete(self._compose(endpoint), params=params)
@@ -769,7 +769,7 @@ class IqrService (SmqtkWebApp):
                 return make_response_json("session id '%s' not found" % sid,
                                           sid=sid), 404
             iqrs: smqtk_iqr.iqr.IqrSession = self.controller.get_session(sid)
-            iqrs.lock.acquire()  # lock BEFORE releasing controller
+            iqrs.lock.acquire_read()  # lock BEFORE releasing controller
 
         try:
             uuids_pos = [d.uuid() for d in iqrs.positive_descriptors]
@@ -786,7 +786,7 @@ class IqrService (SmqtkWebApp):
                                      in iqrs.rank_contrib_neg_ext]
             wi_count = iqrs.working_set.count()
         finally:
-            iqrs.lock.release()
+            iqrs.lock.release_read()
 
         return make_response_json("Session '%s' info" % sid,
                                   sid=sid,
@@ -1031,7 +1031,7 @@ class IqrService (SmqtkWebApp):
                 return make_response_json("session id '%s' not found" % sid,
                                           sid=sid), 404
             iqrs: smqtk_iqr.iqr.IqrSession = self.controller.get_session(sid)
-            iqrs.lock.acquire()  # lock BEFORE releasing controller
+            iqrs.lock.acquire_read()  # lock BEFORE releasing controller
 
         try:
             all_pos = (iqrs.external_positive_descriptors |
@@ -1040,7 +1040,7 @@ class IqrService (SmqtkWebApp):
                        iqrs.negative_descriptors)
 
         finally:
-            iqrs.lock.release()
+            iqrs.lock.release_read()
 
         is_pos = uid in {d.uuid() for d in all_pos}
         is_neg = uid in {d.uuid() for d in all_neg}
@@ -1253,8 +1253,9 @@ class IqrService (SmqtkWebApp):
                 return make_response_json("session id %s not found" % sid,
                                           sid=sid), 404
             iqrs: smqtk_iqr.iqr.IqrSession = self.controller.get_session(sid)
-            iqrs.lock.acquire()  # lock BEFORE releasing controller
 
+        # Refinement locks the session itself, only briefly, so that other
+        # requests are not blocked while ranking.
         try:
             LOG.info("[%s] Refining", sid)
             iqrs.refine()
@@ -1264,8 +1265,6 @@ class IqrService (SmqtkWebApp):
                 return make_response_json("No initialization has occurred yet "
                                           "for this IQR session."), 400
             raise
-        finally:
-            iqrs.lock.release()
 
         return make_response_json("Refine complete", sid=sid), 201
 
@@ -1292,7 +1291,7 @@ class IqrService (SmqtkWebApp):
                 return make_response_json("session id '%s' not found" % sid,
                                           sid=sid), 404
             iqrs: smqtk_iqr.iqr.IqrSession = self.controller.get_session(sid)
-            iqrs.lock.acquire()  # lock BEFORE releasing controller
+            iqrs.lock.acquire_read()  # lock BEFORE releasing controller
 
         try:
             if iqrs.results:
@@ -1301,7 +1300,7 @@ class IqrService (SmqtkWebApp):
                 size = 0
 
         finally:
-            iqrs.lock.release()
+            iqrs.lock.release_read()
 
         return make_response_json("Currently %d results for session %s"
                                   % (size, sid),
@@ -1367,8 +1366,9 @@ class IqrService (SmqtkWebApp):
                 return make_response_json("session id '%s' not found" % sid,
                                           sid=sid), 404
             iqrs: smqtk_iqr.iqr.IqrSession = self.controller.get_session(sid)
-            iqrs.lock.acquire()  # lock BEFORE releasing controller
 
+        # Result views briefly lock the session themselves, so it is not
+        # locked here as publishing a cached view takes the write lock.
         try:
             ordered_results = iqrs.ordered_results()
             num_results = len(ordered_results)
@@ -1380,9 +1380,6 @@ class IqrService (SmqtkWebApp):
         except ValueError:
             return make_response_json("Invalid bounds index value(s)"), 400
 
-        finally:
-            iqrs.lock.release()
-
         return make_response_json("Returning result pairs",
                                   sid=sid, i=i, j=j,
                                   total_results=num_results,
@@ -1441,8 +1438,9 @@ class IqrService (SmqtkWebApp):
                 return make_response_json("session id '%s' not found" % sid,
                                           sid=sid), 404
             iqrs: smqtk_iqr.iqr.IqrSession = self.controller.get_session(sid)
-            iqrs.lock.acquire()  # lock BEFORE releasing controller
 
+        # Result views briefly lock the session themselves, so it is not
+        # locked here as publishing a cached view takes the write lock.
         try:
             feedback_results = iqrs.feedback_results()
             num_results = len(feedback_results)
@@ -1454,9 +1452,6 @@ class IqrService (SmqtkWebApp):
         except ValueError:
             return make_response_json("Invalid bounds index value(s)"), 400
 
-        finally:
-            iqrs.lock.release()
-
         return make_response_json("Returning feedback uuids",
                                   sid=sid, i=i, j=j,
                                   total_results=num_results,
@@ -1518,8 +1513,9 @@ class IqrService (SmqtkWebApp):
                 return make_response_json("session id '%s' not found" % sid,
                                           sid=sid), 404
             iqrs: smqtk_iqr.iqr.IqrSession = self.controller.get_session(sid)
-            iqrs.lock.acquire()  # lock BEFORE releasing controller
 
+        # Result views briefly lock the session themselves, so it is not
+        # locked here as publishing a cached view takes the write lock.
         try:
             pos_results = iqrs.get_positive_adjudication_relevancy()
             num_pos = len(pos_results)
@@ -1529,8 +1525,6 @@ class IqrService (SmqtkWebApp):
             r = [[d.uuid(), prob] for d, prob in pos_results[i:j]]
         except ValueError:
             return make_response_json("Invalid bounds index value(s)"), 400
-        finally:
-            iqrs.lock.release()
 
         return make_response_json(
             "success", sid=sid, i=i, j=j,
@@ -1593,8 +1587,9 @@ class IqrService (SmqtkWebApp):
                 return make_response_json("session id '%s' not found" % sid,
                                           sid=sid), 404
             iqrs: smqtk_iqr.iqr.IqrSession = self.controller.get_session(sid)
-            iqrs.lock.acquire()  # lock BEFORE releasing controller
 
+        # Result views briefly lock the session themselves, so it is not
+        # locked here as publishing a cached view takes the write lock.
         try:
             neg_results = iqrs.get_negative_adjudication_relevancy()
             num_neg = len(neg_results)
@@ -1604,8 +1599,6 @@ class IqrService (SmqtkWebApp):
             r = [[d.uuid(), prob] for d, prob in neg_results[i:j]]
         except ValueError:
             return make_response_json("Invalid bounds index value(s)"), 400
-        finally:
-            iqrs.lock.release()
 
         return make_response_json(
             "success", sid=sid, i=i, j=j,
@@ -1672,8 +1665,9 @@ class IqrService (SmqtkWebApp):
                 return make_response_json("session id '%s' not found" % sid,
                                           sid=sid), 404
             iqrs: smqtk_iqr.iqr.IqrSession = self.controller.get_session(sid)
-            iqrs.lock.acquire()  # lock BEFORE releasing controller
 
+        # Result views briefly lock the session themselves, so it is not
+        # locked here as publishing a cached view takes the write lock.
         try:
             unadj_ordered = iqrs.get_unadjudicated_relevancy()
             total = len(unadj_ordered)
@@ -1683,8 +1677,6 @@ class IqrService (SmqtkWebApp):
             r = [[d.uuid(), prob] for d, prob in unadj_ordered[i:j]]
         except ValueError:
             return make_response_json("Invalid bounds index value(s)"), 400
-        finally:
-            iqrs.lock.release()
 
         return make_response_json(
             "success", sid=sid, i=i, j=j,
@@ -1948,12 +1940,10 @@ class IqrService (SmqtkWebApp):
                 return make_response_json("session id '%s' not found" % sid,
                                           sid=sid), 404
             iqrs: smqtk_iqr.iqr.IqrSession = self.controller.get_session(sid)
-            iqrs.lock.acquire()  # lock BEFORE releasing controller
 
-        try:
-            iqrs_state_bytes = iqrs.get_state_bytes()
-        finally:
-            iqrs.lock.release()
+        # State serialization only holds the session read lock while
+        # copying its adjudications.
+        iqrs_state_bytes = iqrs.get_state_bytes()
 
         # Convert state bytes to a base64 string
         # - `b64encode` returns bytes, so decode to a string.
@@ -74,7 +74,8 @@ class FileUploadMod (flask.Blueprint):
 
             """
             form = flask.request.form
-            LOG.debug("POST form contents: %s" % str(flask.request.form))
+            # Formatted lazily as this runs for every uploaded chunk.
+            LOG.debug("POST form contents: %s", form)
 
             fid = form['flowIdentifier']
             current_chunk = int(form['flowChunkNumber'])
@@ -93,7 +94,7 @@ class FileUploadMod (flask.Blueprint):
                     % (current_chunk, total_chunks, filename)
 
                 if total_chunks == len(self._file_chunks[fid]):
-                    LOG.debug("[%s] Final chunk uploaded", filename+"::"+fid)
+                    LOG.debug("[%s::%s] Final chunk uploaded", filename, fid)
                     # have all chucks in memory now
                     try:
                         # Combine chunks into single file
@@ -101,16 +102,16 @@ class FileUploadMod (flask.Blueprint):
                         file_saved_path = self._write_file_chunks(
                             self._file_chunks[fid], file_ext
                         )
-                        LOG.debug("[%s] saved from chunks: %s",
-                                  filename+"::"+fid, file_saved_path)
+                        LOG.debug("[%s::%s] saved from chunks: %s",
+                                  filename, fid, file_saved_path)
                         # now in file, free up dict memory
 
                         self._completed_files[fid] = file_saved_path
                         message = "[%s] Completed upload" % (filename+"::"+fid)
 
                     except IOError as ex:
-                        LOG.debug("[%s] Failed to write combined chunks",
-                                  filename+"::"+fid)
+                        LOG.debug("[%s::%s] Failed to write combined chunks",
+                                  filename, fid)
                         message = "Failed to write out combined chunks for " \
                                   "file %s: %s" % (filename, str(ex))
                         raise RuntimeError(message)
@@ -2,18 +2,28 @@
 IQR Search sub-application module
 """
 import base64
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import functools
 from io import BytesIO
-import json
 import os
 import os.path as osp
 import random
 import shutil
-from typing import Any, Dict, Hashable, Type, TypeVar, Optional, TYPE_CHECKING
+import struct
+import tempfile
+import threading
+import time
+from typing import (
+    Any, BinaryIO, cast, Dict, Hashable, List, Set, Type, TypeVar, Optional, Tuple,
+    TYPE_CHECKING
+)
 import zipfile
 import logging
 
 import flask
 import PIL.Image
+import requests
 
 from smqtk_dataprovider import DataSet, DataElement
 from smqtk_dataprovider.utils.file import safe_create_dir
@@ -24,6 +34,7 @@ from smqtk_core.configuration import (
     make_default_config,
     to_config_dict
 )
+from smqtk_iqr.utils.fast_json import json_dumps, json_loads
 from smqtk_iqr.utils.web import ServiceProxy
 from smqtk_iqr.iqr import IqrSession
 from smqtk_iqr.utils.mimetype import get_mimetypes
@@ -31,6 +42,11 @@ from smqtk_iqr.utils.preview_cache import PreviewCache
 from smqtk_iqr.web.search_app.modules.file_upload.FileUploadMod import FileUploadMod
 from smqtk_iqr.web.search_app.modules.static_host import StaticDirectoryHost
 
+try:
+    from whitenoise import WhiteNoise
+except ImportError:
+    WhiteNoise = None
+
 # Without this if-statement there is an import cycle and a runtime error,
 # but we only need this import during type checking so this checks for that.
 if TYPE_CHECKING:
@@ -43,6 +59,114 @@ T = TypeVar("T", bound="IqrSearch")
 MT = get_mimetypes()
 
 
+# Chunk size used when streaming example data to disk. This is a multiple of 4
+# so that base64 text may be decoded chunk-wise.
+_COPY_CHUNK_SIZE = 1 << 20
+
+# Chunk size used when base64 encoding files. This is a multiple of 3 so that
+# encoded chunks concatenate without intermediate padding.
+_B64_ENCODE_CHUNK_SIZE = 57 * 1024
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# JPEG start-of-frame markers, which record the image dimensions.
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# JPEG markers that are not followed by a segment length.
+_JPEG_STANDALONE_MARKERS = frozenset(range(0xD0, 0xDA)) | {0x01}
+
+
+def _read_jpeg_size(f: BinaryIO) -> Optional[Tuple[int, int]]:
+    """
+    Scan JPEG segment markers, just after the SOI marker, for the first
+    start-of-frame segment and return the ``(width, height)`` it records, or
+    None if not found.
+    """
+    while True:
+        b = f.read(1)
+        if b != b'\xff':
+            return None
+        marker = f.read(1)
+        while marker == b'\xff':  # fill bytes
+            marker = f.read(1)
+        if not marker:
+            return None
+        m = marker[0]
+        if m in _JPEG_STANDALONE_MARKERS:
+            continue
+        seg_len_b = f.read(2)
+        if len(seg_len_b) != 2:
+            return None
+        seg_len = struct.unpack('>H', seg_len_b)[0]
+        if m in _JPEG_SOF_MARKERS:
+            # precision (1 byte), height (2 bytes), width (2 bytes)
+            sof = f.read(5)
+            if len(sof) != 5:
+                return None
+            height, width = struct.unpack('>HH', sof[1:])
+            return width, height
+        f.seek(seg_len - 2, os.SEEK_CUR)
+
+
+def _read_image_size(path: str) -> Tuple[int, int]:
+    """
+    Get the ``(width, height)`` of the image at the given path.
+
+    PNG and JPEG dimensions are read directly from the file header without
+    PIL, otherwise falling back to opening the image with PIL.
+    """
+    with open(path, 'rb') as f:
+        head = f.read(24)
+        if head.startswith(_PNG_SIGNATURE) and head[12:16] == b'IHDR':
+            return struct.unpack('>II', head[16:24])
+        if head.startswith(b'\xff\xd8'):
+            f.seek(2)
+            size = _read_jpeg_size(f)
+            if size is not None:
+                return size
+    with PIL.Image.open(path) as img:
+        return img.size
+
+
+# Pre-serialized bodies of constant JSON responses.
+_JSON_ALIVE = json_dumps({"alive": True})
+_JSON_SUCCESS = json_dumps({"success": True})
+_JSON_REFINE_SUCCESS = json_dumps({
+    "success": True,
+    "message": "Completed refinement",
+})
+
+
+def _json_response(body: bytes) -> flask.Response:
+    """
+    Make a new JSON response with the given pre-serialized body.
+
+    A new response is made per request as flask may modify a response
+    afterwards, e.g. to set the session cookie.
+    """
+    return flask.Response(body, mimetype="application/json")
+
+
+def _jsonify(obj: object) -> flask.Response:
+    """
+    Make a new JSON response of the given object, like ``flask.jsonify`` but
+    serialized with ``orjson`` when available.
+    """
+    return _json_response(json_dumps(obj))
+
+
+def _b64encode_file(path: str) -> bytes:
+    """
+    Get the standard base64 encoding of the file at the given path.
+
+    The file is encoded chunk-wise so that its full raw content is not held in
+    memory alongside the encoding.
+    """
+    buf = BytesIO()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_B64_ENCODE_CHUNK_SIZE), b''):
+            buf.write(base64.b64encode(chunk))
+    return buf.getvalue()
+
+
 class IqrSearch (flask.Flask, Configurable):
     """
     IQR Search Tab blueprint
@@ -67,6 +191,29 @@ class IqrSearch (flask.Flask, Configurable):
 
     # TODO: User access white/black-list? See ``search_app/__init__.py``:L135
 
+    # Maximum number of data preview information entries to keep cached.
+    PREVIEW_INFO_CACHE_SIZE = 16 ** 4
+    # Maximum number of data set UUID membership results to keep cached.
+    HAS_UUID_CACHE_SIZE = 1 << 20
+    # Maximum number of adjudication states to keep cached per session, and
+    # the seconds a cached state is considered fresh for.
+    ADJUDICATION_CACHE_SIZE = 8192
+    ADJUDICATION_CACHE_TTL = 2.0
+    # Number of threads writing out example data files when loading a state
+    # package.
+    STATE_WRITE_WORKERS = 8
+    # Number of threads packaging downloaded state, bounding how many
+    # packages are built at once, and the size in bytes a package may reach
+    # before being spooled to disk instead of held in memory.
+    STATE_PACKAGE_WORKERS = 4
+    STATE_PACKAGE_SPOOL_SIZE = 1 << 24
+
+    # State package entries for session example data: a JSON manifest mapping
+    # data UUIDs to content types, and the raw bytes for each UUID under the
+    # prefix.
+    STATE_WORKING_DATA_MANIFEST = "working_data_manifest.json"
+    STATE_WORKING_DATA_PREFIX = "working_data/"
+
     @classmethod
     def get_default_config(cls) -> Dict[str, Any]:
         d = super(IqrSearch, cls).get_default_config()
@@ -139,21 +286,47 @@ class IqrSearch (flask.Flask, Configurable):
 
         self._parent_app = parent_app
         self._data_set = data_set
-        self._iqr_service = ServiceProxy(iqr_service_url.rstrip('/'))
+        # Keep enough service connections alive for the threads a server may
+        # concurrently handle requests with.
+        self._iqr_service = ServiceProxy(
+            iqr_service_url.rstrip('/'),
+            pool_maxsize=(os.cpu_count() or 1) * 4
+        )
 
         # base directory that's transformed by the ``work_dir`` property into
         # an absolute path.
         self._working_dir = working_directory
+        # Resolved once as the process working directory is not expected to
+        # change while serving.
+        self._work_dir_resolved = \
+            osp.expanduser(osp.abspath(self._working_dir))
         # Directory to put things to allow them to be statically available to
         # public users.
         self._static_data_prefix = "static/data"
         self._static_data_dir = osp.join(self.work_dir, 'static')
+        # Path prefix of files within the static directory, for making their
+        # paths relative to it without ``os.path.relpath``.
+        self._static_data_dir_prefix = \
+            osp.join(osp.normpath(self._static_data_dir), '')
 
         # Custom static host sub-module
         self.mod_static_dir = StaticDirectoryHost('%s_static' % self.name,
                                                   self._static_data_dir,
                                                   self._static_data_prefix)
         self.register_blueprint(self.mod_static_dir)
+        # When available, serve static data files with WhiteNoise at the WSGI
+        # layer, ahead of Flask request handling, with caching headers.
+        # Requests not matching a file fall through to the static host above.
+        # - Files present now are scanned once. Files written while running
+        #   are registered as their links are handed out, which is safe as
+        #   they are named by UUID and never change once written.
+        self._whitenoise: Optional[Any] = None
+        if WhiteNoise is not None:
+            self._whitenoise = WhiteNoise(self.wsgi_app, max_age=3600)
+            if osp.isdir(self._static_data_dir):
+                self._whitenoise.add_files(self._static_data_dir,
+                                           prefix=self._static_data_prefix)
+            self.wsgi_app = self._whitenoise  # type: ignore
 
         # Uploader Sub-Module
         self.upload_work_dir = os.path.join(self.work_dir, "uploads")
@@ -177,9 +350,55 @@ class IqrSearch (flask.Flask, Configurable):
         self._preview_cache = PreviewCache(osp.join(self._static_data_dir,
                                                     "previews"))
 
-        # Cache mapping of written static files for data elements
-        self._static_cache: Dict[Hashable, str] = {}
-        self._static_cache_element: Dict[Hashable, DataElement] = {}
+        # Cache mapping of data element UUIDs to their written static files.
+        # Files are named by UUID, so those written by a previous run in this
+        # work directory are picked up again here.
+        self._static_cache: Dict[str, str] = {}
+        if osp.isdir(self._static_data_dir):
+            for entry in os.scandir(self._static_data_dir):
+                # Hidden files are partial writes in progress.
+                if entry.is_file() and not entry.name.startswith('.'):
+                    self._static_cache[osp.splitext(entry.name)[0]] = \
+                        entry.path
+
+        # LRU cache of data preview information (shape and static links).
+        # Data set elements are keyed by UUID, while session example data is
+        # keyed by ``(sid, uuid)`` so it is only served to its own session.
+        self._preview_info_cache: "OrderedDict[Hashable, Dict[str, Any]]" = \
+            OrderedDict()
+        self._preview_info_lock = threading.Lock()
+
+        # Session IDs known to exist on the IQR service, to skip querying the
+        # service for its session IDs on every request.
+        self._known_service_sids: Set[str] = set()
+        self._known_service_sids_lock = threading.Lock()
+
+        # Memoized data set UUID membership, as lookups may hit disk or a
+        # database for some DataSet implementations. The data set is not
+        # mutated by this application, so entries do not go stale.
+        self._has_uuid_cached = functools.lru_cache(
+            maxsize=self.HAS_UUID_CACHE_SIZE
+        )(self._data_set.has_uuid)
+
+        # Materialized list of all data set UUIDs, populated on first use, for
+        # random ordering without iterating the data set on every request.
+        self._all_uuids_cache: Optional[List[Hashable]] = None
+        self._all_uuids_lock = threading.Lock()
+
+        # Short-lived cache of element adjudication states from the IQR
+        # service, for UI polling. Mapping of session ID to element UUID to
+        # the state's expiry time and the state.
+        self._adjudication_cache: Dict[
+            str,
+            "OrderedDict[str, Tuple[float, Dict[str, bool]]]"
+        ] = {}
+        self._adjudication_lock = threading.Lock()
+
+        # Shared pool to build downloaded state packages on.
+        self._state_package_executor = ThreadPoolExecutor(
+            max_workers=self.STATE_PACKAGE_WORKERS,
+            thread_name_prefix='IqrSearch-state-package'
+        )
 
         #
         # Routing
@@ -212,8 +431,8 @@ class IqrSearch (flask.Flask, Configurable):
             """
             sid = self.get_current_iqr_session()
             get_r = self._iqr_service.get('session', sid=sid)
-            get_r.raise_for_status()
-            return flask.jsonify(get_r.json())
+            self._check_service_response(get_r, sid)
+            return _json_response(get_r.content)
 
         @self.route('/get_iqr_state')
         @self._parent_app.module_login.login_required
@@ -233,52 +452,19 @@ class IqrSearch (flask.Flask, Configurable):
 
             # Get the state base64 from the underlying service.
             r_get = self._iqr_service.get('state', sid=sid)
-            r_get.raise_for_status()
-            state_b64 = r_get.json()['state_b64']
+            self._check_service_response(r_get, sid)
+            state_b64 = json_loads(r_get.content)['state_b64']
             state_bytes = base64.b64decode(state_b64)
-
-            # Load state dictionary from base-64 ZIP payload from service
-            # - GET content is base64, so decode first and then read as a
-            #   ZipFile buffer.
-            # - `r_get.content` is `byte` type so it can be passed directly to
-            #   base64 decode.
-            state_dict = json.load(
-                zipfile.ZipFile(
-                    BytesIO(state_bytes),
-                    'r',
-                    IqrSession.STATE_ZIP_COMPRESSION
-                ).open(IqrSession.STATE_ZIP_FILENAME)
-            )
             r_get.close()
 
-            # Wrap service state with our UI state: uploaded data elements.
-            # Data elements are stored as a dictionary mapping UUID to MIMETYPE
-            # and data byte string.
-            working_data = {}
-            sid_data_elems: Dict[Hashable, DataElement] = self._iqr_example_data.get(sid, {})
-            for uid in sid_data_elems:
-                # Decoding base64 as ASCII knowing that
-                # `base64.urlsafe_b64decode` is used later, whose doc-string
-                # states that it may expect an ASCII string when not bytes.
-                working_data[uid] = {
-                    'content_type': sid_data_elems[uid].content_type(),
-                    'bytes_base64':
-                        base64.b64encode(sid_data_elems[uid].get_bytes())
-                              .decode('ascii'),
-                }
-
-            state_dict["working_data"] = working_data
-            state_json = json.dumps(state_dict)
-
-            z_wrapper_buffer = BytesIO()
-            z_wrapper = zipfile.ZipFile(z_wrapper_buffer, 'w',
-                                        IqrSession.STATE_ZIP_COMPRESSION)
-            z_wrapper.writestr(IqrSession.STATE_ZIP_FILENAME, state_json)
-            z_wrapper.close()
-
-            z_wrapper_buffer.seek(0)
+            # Build the package on the shared pool from a snapshot of the
+            # session's example data, which other requests may modify.
+            sid_data_elems = dict(self._iqr_example_data.get(sid, {}))
+            z_wrapper_file = self._state_package_executor.submit(
+                self._package_state, state_bytes, sid_data_elems
+            ).result()
             return flask.send_file(
-                z_wrapper_buffer,
+                z_wrapper_file,
                 mimetype='application/octet-stream',
                 as_attachment=True,
                 attachment_filename="%s.IqrState" % sid
@@ -312,43 +498,81 @@ class IqrSearch (flask.Flask, Configurable):
 
             # Load ZIP package back in, then remove the uploaded file.
             try:
-                z = zipfile.ZipFile(
+                with zipfile.ZipFile(
                     upload_filepath,
                     compression=IqrSession.STATE_ZIP_COMPRESSION
-                )
-                with z.open(IqrSession.STATE_ZIP_FILENAME) as f:
-                    state_dict = json.load(f)
-                z.close()
+                ) as z:
+                    state_dict = json_loads(
+                        z.read(IqrSession.STATE_ZIP_FILENAME))
+                    # Packages from before working data was stored as raw entries
+                    # embed it base64 encoded in the state JSON.
+                    legacy_working_data: Dict[str, Dict] = \
+                        state_dict.pop('working_data', {})
+                    manifest: Dict[str, str] = {}
+                    if self.STATE_WORKING_DATA_MANIFEST in z.namelist():
+                        manifest = json_loads(
+                            z.read(self.STATE_WORKING_DATA_MANIFEST))
+                    # Other entries belong to the service state and are passed
+                    # back to it unchanged.
+                    service_entries = [
+                        (info, z.read(info)) for info in z.infolist()
+                        if info.filename not in (
+                            IqrSession.STATE_ZIP_FILENAME,
+                            self.STATE_WORKING_DATA_MANIFEST
+                        ) and not info.filename.startswith(
+                            self.STATE_WORKING_DATA_PREFIX
+                        )
+                    ]
+
+                    #
+                    # Consume working data UUID/bytes
+                    #
+                    # Reset this server's resources for an SID
+                    self.reset_session_local(sid)
+
+                    def write_entry(
+                        uuid_sha1: str, data_mimetype: str
+                    ) -> Tuple[str, str]:
+                        data_filepath = self._example_data_filepath(
+                            sid, uuid_sha1, data_mimetype)
+                        with z.open(self.STATE_WORKING_DATA_PREFIX + uuid_sha1) as src, \
+                                open(data_filepath, 'wb') as dst:
+                            shutil.copyfileobj(src, dst, _COPY_CHUNK_SIZE)
+                        return uuid_sha1, data_filepath
+
+                    def write_legacy_entry(
+                        uuid_sha1: str, data_meta: Dict[str, str]
+                    ) -> Tuple[str, str]:
+                        data_b64 = str(data_meta['bytes_base64'])
+                        data_filepath = self._example_data_filepath(
+                            sid, uuid_sha1, data_meta['content_type'])
+                        with open(data_filepath, 'wb') as dst:
+                            # Decode chunk-wise to not hold a second, decoded
+                            # copy of potentially large data in memory.
+                            for i in range(0, len(data_b64), _COPY_CHUNK_SIZE):
+                                dst.write(base64.urlsafe_b64decode(
+                                    data_b64[i:i + _COPY_CHUNK_SIZE]))
+                        return uuid_sha1, data_filepath
+
+                    # - Write out files to session-specific work directory,
+                    #   concurrently as each file is independent.
+                    # - Update self._iqr_example_data with DataFileElement
+                    #   instances referencing the just-written files.
+                    with ThreadPoolExecutor(
+                        max_workers=self.STATE_WRITE_WORKERS
+                    ) as executor:
+                        futures = [
+                            executor.submit(write_entry, uid, mimetype)
+                            for uid, mimetype in manifest.items()
+                        ] + [
+                            executor.submit(write_legacy_entry, uid, meta)
+                            for uid, meta in legacy_working_data.items()
+                        ]
+                        for future in futures:
+                            self._add_example_data_file(sid, *future.result())
             finally:
                 os.remove(upload_filepath)
 
-            #
-            # Consume working data UUID/bytes
-            #
-            # Reset this server's resources for an SID
-            self.reset_session_local(sid)
-            # - Dictionary of data UUID (SHA1) to {'content_type': <str>,
-            #   'bytes_base64': <str>} dictionary.
-            working_data: Dict[str, Dict] = state_dict['working_data']
-            del state_dict['working_data']
-            # - Write out base64-decoded files to session-specific work
-            #   directory.
-            # - Update self._iqr_example_data with DataFileElement instances
-            #   referencing the just-written files.
-            for uuid_sha1 in working_data:
-                data_mimetype = working_data[uuid_sha1]['content_type']
-                data_b64 = str(working_data[uuid_sha1]['bytes_base64'])
-                # Output file to working directory on disk.
-                data_filepath = os.path.join(
-                    self._iqr_work_dirs[sid],
-                    '%s%s' % (uuid_sha1, MT.guess_extension(data_mimetype))
-                )
-                with open(data_filepath, 'wb') as f:
-                    f.write(base64.urlsafe_b64decode(data_b64))
-                # Create element reference and store it for the current session.
-                data_elem = DataFileElement(data_filepath, readonly=True)
-                self._iqr_example_data[sid][uuid_sha1] = data_elem
-
             #
             # Re-package service state as a ZIP payload.
             #
@@ -356,17 +580,20 @@ class IqrSearch (flask.Flask, Configurable):
             service_zip = zipfile.ZipFile(service_zip_buffer, 'w',
                                           IqrSession.STATE_ZIP_COMPRESSION)
             service_zip.writestr(IqrSession.STATE_ZIP_FILENAME,
-                                 json.dumps(state_dict))
+                                 json_dumps(state_dict))
+            for info, data in service_entries:
+                service_zip.writestr(info, data)
             service_zip.close()
             service_zip_base64 = \
                 base64.b64encode(service_zip_buffer.getvalue())
 
             # Update service state
-            self._iqr_service.put('state',
-                                  sid=sid,
-                                  state_base64=service_zip_base64)
+            put_r = self._iqr_service.put('state',
+                                          sid=sid,
+                                          state_base64=service_zip_base64)
+            self._check_service_response(put_r, sid)
 
-            return flask.jsonify(return_obj)
+            return _jsonify(return_obj)
 
         @self.route("/check_current_iqr_session")
         @self._parent_app.module_login.login_required
@@ -382,9 +609,7 @@ class IqrSearch (flask.Flask, Configurable):
             # Getting the current IQR session ensures that one has been
             # constructed for the current session.
             _ = self.get_current_iqr_session()
-            return flask.jsonify({
-                "success": True
-            })
+            return _json_response(_JSON_SUCCESS)
 
         @self.route("/get_data_preview_image", methods=["GET"])
         @self._parent_app.module_login.login_required
@@ -395,6 +620,26 @@ class IqrSearch (flask.Flask, Configurable):
             """
             uid = flask.request.args['uid']
 
+            # Check that the UUID is in our indexed data or in the session's
+            # example data before any cached information is served.
+            cache_key: Hashable
+            in_data_set = self._has_uuid_cached(uid)
+            sess_de: Optional[DataElement] = None
+            if in_data_set:
+                cache_key = uid
+            else:
+                sid = self.get_current_iqr_session()
+                sess_de = self._iqr_example_data[sid].get(uid, None)
+                cache_key = (sid, uid)
+
+            if in_data_set or sess_de is not None:
+                with self._preview_info_lock:
+                    hit = self._preview_info_cache.get(cache_key)
+                    if hit is not None:
+                        self._preview_info_cache.move_to_end(cache_key)
+                if hit is not None:
+                    return _jsonify({"success": True, "message": None, **hit})
+
             info: Dict[str, Any] = {
                 "success": True,
                 "message": None,
@@ -403,14 +648,11 @@ class IqrSearch (flask.Flask, Configurable):
                 "static_preview_link": None,
             }
 
-            # Try to find a DataElement by the given UUID in our indexed data
-            # or in the session's example data.
             de: Optional[DataElement]
-            if self._data_set.has_uuid(uid):
+            if in_data_set:
                 de = self._data_set.get_data(uid)
             else:
-                sid = self.get_current_iqr_session()
-                de = self._iqr_example_data[sid].get(uid, None)
+                de = sess_de
 
             if not de:
                 info["success"] = False
@@ -420,27 +662,22 @@ class IqrSearch (flask.Flask, Configurable):
                 # Preview_path should be a path within our statically hosted
                 # area.
                 preview_path = self._preview_cache.get_preview_image(de)
-                img = PIL.Image.open(preview_path)
-                info["shape"] = img.size
-
-                if de.uuid() not in self._static_cache:
-                    self._static_cache[de.uuid()] = \
-                        de.write_temp(self._static_data_dir)
-                    self._static_cache_element[de.uuid()] = de
-
-                # Need to format links by transforming the generated paths to
-                # something usable by webpage:
-                # - make relative to the static directory, and then pre-pending
-                #   the known static url to the
-                info["static_preview_link"] = \
-                    self._static_data_prefix + '/' + \
-                    os.path.relpath(preview_path, self._static_data_dir)
-                info['static_file_link'] = \
-                    self._static_data_prefix + '/' + \
-                    os.path.relpath(self._static_cache[de.uuid()],
-                                    self._static_data_dir)
-
-            return flask.jsonify(info)
+                info["shape"] = _read_image_size(preview_path)
+
+                static_path = self._get_static_file(de)
+
+                info["static_preview_link"] = self._static_link(preview_path)
+                info['static_file_link'] = self._static_link(static_path)
+                self._serve_static_file(preview_path,
+                                        info["static_preview_link"])
+                self._serve_static_file(static_path, info['static_file_link'])
+
+                self._cache_preview_info(cache_key, {
+                    k: info[k] for k in ("shape", "static_file_link",
+                                         "static_preview_link")
+                })
+
+            return _jsonify(info)
 
         @self.route('/iqr_ingest_file', methods=['POST'])
         @self._parent_app.module_login.login_required
@@ -477,11 +714,12 @@ class IqrSearch (flask.Flask, Configurable):
             # Extend session ingest -- modifying
             LOG.debug("[%s::%s] Adding new data to session "
                       "external positives", sid, fid)
-            data_b64 = base64.b64encode(upload_data.get_bytes())
+            data_b64 = _b64encode_file(sess_upload)
             data_ct = upload_data.content_type()
             r = self._iqr_service.post('add_external_pos', sid=sid,
                                        base64=data_b64, content_type=data_ct)
-            r.raise_for_status()
+            self._check_service_response(r, sid)
+            self._invalidate_adjudication_cache(sid)
 
             return str(uuid)
 
@@ -496,9 +734,9 @@ class IqrSearch (flask.Flask, Configurable):
 
             # (Re)Initialize working index
             post_r = self._iqr_service.post('initialize', sid=sid)
-            post_r.raise_for_status()
+            self._check_service_response(post_r, sid)
 
-            return flask.jsonify(post_r.json())
+            return _json_response(post_r.content)
 
         @self.route("/get_example_adjudication", methods=["GET"])
         @self._parent_app.module_login.login_required
@@ -513,16 +751,9 @@ class IqrSearch (flask.Flask, Configurable):
                 }
 
             """
-            # TODO: Collapse example and index adjudication endpoints.
             elem_uuid = flask.request.args['uid']
             sid = self.get_current_iqr_session()
-            get_r = self._iqr_service.get('adjudicate', sid=sid, uid=elem_uuid)
-            get_r.raise_for_status()
-            get_r_json = get_r.json()
-            return flask.jsonify({
-                "is_pos": get_r_json['is_pos'],
-                "is_neg": get_r_json['is_neg'],
-            })
+            return _jsonify(self._get_adjudication(sid, elem_uuid))
 
         @self.route("/get_index_adjudication", methods=["GET"])
         @self._parent_app.module_login.login_required
@@ -539,16 +770,9 @@ class IqrSearch (flask.Flask, Configurable):
                     is_neg: <bool>
                 }
             """
-            # TODO: Collapse example and index adjudication endpoints.
             elem_uuid = flask.request.args['uid']
             sid = self.get_current_iqr_session()
-            get_r = self._iqr_service.get('adjudicate', sid=sid, uid=elem_uuid)
-            get_r.raise_for_status()
-            get_r_json = get_r.json()
-            return flask.jsonify({
-                "is_pos": get_r_json['is_pos'],
-                "is_neg": get_r_json['is_neg'],
-            })
+            return _jsonify(self._get_adjudication(sid, elem_uuid))
 
         @self.route("/adjudicate", methods=["POST"])
         @self._parent_app.module_login.login_required
@@ -562,12 +786,12 @@ class IqrSearch (flask.Flask, Configurable):
                     message: <str>
                 }
             """
-            pos_to_add = json.loads(flask.request.form.get('add_pos', '[]'))
-            pos_to_remove = json.loads(flask.request.form.get('remove_pos',
-                                                              '[]'))
-            neg_to_add = json.loads(flask.request.form.get('add_neg', '[]'))
-            neg_to_remove = json.loads(flask.request.form.get('remove_neg',
-                                                              '[]'))
+            # Additions are JSON lists forwarded to the service as-is, only
+            # the removals need decoding to combine them.
+            pos_to_add = flask.request.form.get('add_pos', '[]')
+            pos_to_remove = flask.request.form.get('remove_pos', '[]')
+            neg_to_add = flask.request.form.get('add_neg', '[]')
+            neg_to_remove = flask.request.form.get('remove_neg', '[]')
 
             msg = "Adjudicated Positive{+%s, -%s}, " \
                   "Negative{+%s, -%s} " \
@@ -577,16 +801,18 @@ class IqrSearch (flask.Flask, Configurable):
 
             sid = self.get_current_iqr_session()
 
-            to_neutral = list(set(pos_to_remove) | set(neg_to_remove))
+            to_neutral = list(set(json_loads(pos_to_remove)) |
+                              set(json_loads(neg_to_remove)))
 
             post_r = self._iqr_service.post('adjudicate',
                                             sid=sid,
-                                            pos=json.dumps(pos_to_add),
-                                            neg=json.dumps(neg_to_add),
-                                            neutral=json.dumps(to_neutral))
-            post_r.raise_for_status()
+                                            pos=pos_to_add,
+                                            neg=neg_to_add,
+                                            neutral=json_dumps(to_neutral))
+            self._check_service_response(post_r, sid)
+            self._invalidate_adjudication_cache(sid)
 
-            return flask.jsonify({
+            return _jsonify({
                 "success": True,
                 "message": msg
             })
@@ -603,11 +829,8 @@ class IqrSearch (flask.Flask, Configurable):
             """
             sid = self.get_current_iqr_session()
             post_r = self._iqr_service.post('refine', sid=sid)
-            post_r.raise_for_status()
-            return flask.jsonify({
-                "success": True,
-                "message": "Completed refinement",
-            })
+            self._check_service_response(post_r, sid)
+            return _json_response(_JSON_REFINE_SUCCESS)
 
         @self.route("/iqr_ordered_results", methods=['GET'])
         @self._parent_app.module_login.login_required
@@ -636,8 +859,8 @@ class IqrSearch (flask.Flask, Configurable):
                 params['j'] = j
 
             get_r = self._iqr_service.get('get_results', **params)
-            get_r.raise_for_status()
-            return flask.jsonify(get_r.json())
+            self._check_service_response(get_r, params['sid'])
+            return _json_response(get_r.content)
 
         @self.route("/reset_iqr_session", methods=["POST"])
         @self._parent_app.module_login.login_required
@@ -648,10 +871,14 @@ class IqrSearch (flask.Flask, Configurable):
             sid = self.get_current_iqr_session()
             # Reset service
             put_r = self._iqr_service.put('session', sid=sid)
+            # Re-check the service for this session on its next use, also
+            # when the service no longer has it.
+            with self._known_service_sids_lock:
+                self._known_service_sids.discard(sid)
             put_r.raise_for_status()
             # Reset local server resources
             self.reset_session_local(sid)
-            return flask.jsonify({"success": True})
+            return _json_response(_JSON_SUCCESS)
 
         @self.route("/get_random_uids")
         @self._parent_app.module_login.login_required
@@ -663,24 +890,34 @@ class IqrSearch (flask.Flask, Configurable):
             Thus, we assume that the nearest neighbor index that is searchable
             is from at least this set of data.
 
+            Optional URL arguments:
+                n
+                    Maximum number of random IDs to return. All IDs are
+                    returned by default.
+
             :return: {
                     uids: list[str]
                 }
             """
-            all_ids = list(self._data_set.uuids())
-            random.shuffle(all_ids)
-            return flask.jsonify({
+            with self._all_uuids_lock:
+                if self._all_uuids_cache is None:
+                    self._all_uuids_cache = list(self._data_set.uuids())
+                all_ids = self._all_uuids_cache
+            n = flask.request.args.get('n', len(all_ids), type=int)
+            # Sample leaving the cached list unchanged. This only does O(n)
+            # work when n is small relative to the number of IDs.
+            all_ids = random.sample(all_ids, k=max(0, min(n, len(all_ids))))
+            return _jsonify({
                 "uids": all_ids
             })
 
         @self.route('/is_ready')
         def is_ready() -> flask.Response:
             """ Simple 'I'm alive' endpoint """
-            return flask.jsonify({
-                "alive": True,
-            })
+            return _json_response(_JSON_ALIVE)
 
     def __del__(self) -> None:
+        self._state_package_executor.shutdown(wait=False)
         for wdir in self._iqr_work_dirs.values():
             if os.path.isdir(wdir):
                 shutil.rmtree(wdir)
@@ -697,7 +934,7 @@ class IqrSearch (flask.Flask, Configurable):
         """
         :return: Common work directory for this instance.
         """
-        return osp.expanduser(osp.abspath(self._working_dir))
+        return self._work_dir_resolved
 
     def get_current_iqr_session(self) -> str:
         """
@@ -707,12 +944,17 @@ class IqrSearch (flask.Flask, Configurable):
 
         # Ensure there is an initialized session on the configured service.
         created_session = False
-        get_r = self._iqr_service.get('session_ids')
-        get_r.raise_for_status()
-        if sid not in get_r.json()['session_uuids']:
-            post_r = self._iqr_service.post('session', sid=sid)
-            post_r.raise_for_status()
-            created_session = True
+        with self._known_service_sids_lock:
+            sid_known = sid in self._known_service_sids
+        if not sid_known:
+            get_r = self._iqr_service.get('session_ids')
+            get_r.raise_for_status()
+            if sid not in get_r.json()['session_uuids']:
+                post_r = self._iqr_service.post('session', sid=sid)
+                post_r.raise_for_status()
+                created_session = True
+            with self._known_service_sids_lock:
+                self._known_service_sids.add(sid)
 
         if created_session or (sid not in self._iqr_work_dirs):
             # Dictionaries not initialized yet for this UUID.
@@ -723,6 +965,206 @@ class IqrSearch (flask.Flask, Configurable):
 
         return sid
 
+    def _package_state(
+        self, state_bytes: bytes,
+        data_elems: Dict[Hashable, DataElement]
+    ) -> BinaryIO:
+        """
+        Package service state ZIP bytes together with session example data
+        into a state package file, spooled to disk once larger than
+        ``STATE_PACKAGE_SPOOL_SIZE``.
+
+        :param state_bytes: State ZIP payload from the IQR service.
+        :param data_elems: Session example data to include.
+
+        :return: State package file, positioned at its start.
+        """
+        z_wrapper_file = tempfile.SpooledTemporaryFile(
+            max_size=self.STATE_PACKAGE_SPOOL_SIZE
+        )
+        try:
+            # Load base-64 decoded ZIP payload from service
+            service_zip = zipfile.ZipFile(
+                BytesIO(state_bytes),
+                'r',
+                IqrSession.STATE_ZIP_COMPRESSION
+            )
+            z_wrapper = zipfile.ZipFile(z_wrapper_file, 'w',
+                                        IqrSession.STATE_ZIP_COMPRESSION)
+            # Carry over the service state entries as-is.
+            for info in service_zip.infolist():
+                z_wrapper.writestr(info, service_zip.read(info))
+            service_zip.close()
+
+            # Wrap service state with our UI state: uploaded data elements.
+            # Data element bytes are stored raw, one entry per UUID, with a
+            # manifest mapping UUID to MIMETYPE.
+            # - Example data is usually already compressed media, so it is
+            #   stored rather than deflated again.
+            manifest = {}
+            for uid, elem in data_elems.items():
+                manifest[str(uid)] = elem.content_type()
+                z_wrapper.writestr(self.STATE_WORKING_DATA_PREFIX + str(uid),
+                                   elem.get_bytes(),
+                                   compress_type=zipfile.ZIP_STORED)
+            z_wrapper.writestr(self.STATE_WORKING_DATA_MANIFEST,
+                               json_dumps(manifest))
+            z_wrapper.close()
+        except BaseException:
+            z_wrapper_file.close()
+            raise
+        z_wrapper_file.seek(0)
+        return cast(BinaryIO, z_wrapper_file)
+
+    def _check_service_response(
+        self, r: requests.Response, sid: str
+    ) -> None:
+        """
+        Raise for an error response from the IQR service to a request for the
+        given session.
+
+        A 404 response means the service no longer has the session, e.g. it
+        expired or the service restarted, so the session ID is forgotten as
+        known to the service and re-created on its next use.
+
+        :raises requests.HTTPError: The response is an error response.
+        """
+        if r.status_code == 404:
+            with self._known_service_sids_lock:
+                self._known_service_sids.discard(sid)
+        r.raise_for_status()
+
+    def _example_data_filepath(
+        self, sid: str, uid: str, content_type: str
+    ) -> str:
+        """
+        Get the path to write session example data of the given UUID and
+        content type to, within the session's work directory.
+        """
+        return os.path.join(
+            self._iqr_work_dirs[sid],
+            '%s%s' % (uid, MT.guess_extension(content_type))
+        )
+
+    def _add_example_data_file(
+        self, sid: str, uid: str, filepath: str
+    ) -> None:
+        """
+        Record the file at the given path as example data for the session.
+        """
+        # Create element reference and store it for the current session.
+        data_elem = DataFileElement(filepath, readonly=True)
+        self._iqr_example_data[sid][uid] = data_elem
+
+    def _get_static_file(self, de: DataElement) -> str:
+        """
+        Get the path to a copy of the given data element's bytes within the
+        static data directory, writing it if not already present.
+
+        The file is named by the element's UUID, so a copy written by a
+        previous run in the same work directory is reused.
+        """
+        uid = str(de.uuid())
+        path = self._static_cache.get(uid)
+        if path is None:
+            path = osp.join(
+                self._static_data_dir,
+                '%s%s' % (uid, MT.guess_extension(de.content_type() or '') or '')
+            )
+            if not osp.isfile(path):
+                safe_create_dir(self._static_data_dir)
+                # Write under a hidden temporary name first so that a partial
+                # file is never served or reused.
+                fd, tmp_path = tempfile.mkstemp(dir=self._static_data_dir,
+                                                prefix='.')
+                try:
+                    with os.fdopen(fd, 'wb') as f:
+                        f.write(de.get_bytes())
+                    os.replace(tmp_path, path)
+                except BaseException:
+                    os.remove(tmp_path)
+                    raise
+            self._static_cache[uid] = path
+        return path
+
+    def _static_link(self, path: str) -> str:
+        """
+        Transform a path within the static directory into a link usable by the
+        webpage: make it relative to the static directory and prepend the
+        known static url.
+        """
+        if path.startswith(self._static_data_dir_prefix):
+            rel_path = path[len(self._static_data_dir_prefix):]
+        else:
+            # e.g. a path not in normal form.
+            rel_path = os.path.relpath(path, self._static_data_dir)
+        return self._static_data_prefix + '/' + rel_path
+
+    def _serve_static_file(self, path: str, link: str) -> None:
+        """
+        Register a file written into the static directory with WhiteNoise,
+        if in use, so that it is served at the given link from then on.
+        """
+        if self._whitenoise is not None:
+            url = '/' + link
+            if url not in self._whitenoise.files:
+                self._whitenoise.add_file_to_dictionary(url, path)
+
+    def _cache_preview_info(self, key: Hashable, entry: Dict[str, Any]) -> None:
+        """
+        Record data preview information for the given cache key, evicting the
+        least recently used entries beyond ``PREVIEW_INFO_CACHE_SIZE``.
+        """
+        with self._preview_info_lock:
+            self._preview_info_cache[key] = entry
+            self._preview_info_cache.move_to_end(key)
+            while len(self._preview_info_cache) > self.PREVIEW_INFO_CACHE_SIZE:
+                self._preview_info_cache.popitem(last=False)
+
+    def _get_adjudication(self, sid: str, uid: str) -> Dict[str, bool]:
+        """
+        Get the positive/negative adjudication state of an element in a
+        session from the IQR service, reusing a state fetched less than
+        ``ADJUDICATION_CACHE_TTL`` seconds ago.
+
+        :return: {
+                is_pos: <bool>,
+                is_neg: <bool>
+            }
+        """
+        with self._adjudication_lock:
+            sess_cache = self._adjudication_cache.setdefault(sid,
+                                                             OrderedDict())
+            hit = sess_cache.get(uid)
+        if hit is not None and hit[0] > time.monotonic():
+            return hit[1]
+
+        get_r = self._iqr_service.get('adjudicate', sid=sid, uid=uid)
+        self._check_service_response(get_r, sid)
+        get_r_json = json_loads(get_r.content)
+        state = {
+            "is_pos": get_r_json['is_pos'],
+            "is_neg": get_r_json['is_neg'],
+        }
+        expiry = time.monotonic() + self.ADJUDICATION_CACHE_TTL
+        with self._adjudication_lock:
+            # Do not cache a state fetched before an invalidation.
+            if self._adjudication_cache.get(sid) is not sess_cache:
+                return state
+            sess_cache[uid] = (expiry, state)
+            sess_cache.move_to_end(uid)
+            while len(sess_cache) > self.ADJUDICATION_CACHE_SIZE:
+                sess_cache.popitem(last=False)
+        return state
+
+    def _invalidate_adjudication_cache(self, sid: str) -> None:
+        """
+        Drop cached adjudication states for the given session, e.g. after
+        the session's adjudications have been modified.
+        """
+        with self._adjudication_lock:
+            self._adjudication_cache.pop(sid, None)
+
     def reset_session_local(self, sid: str) -> None:
         """
         Reset elements of this server for a given session ID.
@@ -743,4 +1185,9 @@ class IqrSearch (flask.Flask, Configurable):
             shutil.rmtree(self._iqr_work_dirs[sid])
         safe_create_dir(self._iqr_work_dirs[sid])
 
+        # Preview information of session example data is no longer valid.
+        with self._preview_info_lock:
+            for uid in self._iqr_example_data[sid]:
+                self._preview_info_cache.pop((sid, uid), None)
         self._iqr_example_data[sid].clear()
+        self._invalidate_adjudication_cache(sid)
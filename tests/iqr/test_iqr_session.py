@@ -1,7 +1,16 @@
+from concurrent.futures import Executor
+import io
+import json
+import threading
+from typing import Iterable
+import uuid
+import zipfile
+
+import numpy as np
 import pytest
 import unittest.mock as mock
 
-from smqtk_descriptors import DescriptorElementFactory
+from smqtk_descriptors import DescriptorElement, DescriptorElementFactory
 from smqtk_indexing import NearestNeighborsIndex
 from smqtk_relevancy.interfaces.rank_relevancy import RankRelevancyWithFeedback
 from smqtk_iqr.iqr.iqr_session import IqrSession
@@ -9,6 +18,15 @@ from smqtk_descriptors.impls.descriptor_element.memory import \
     DescriptorMemoryElement
 
 
+def _vector(d: DescriptorElement) -> np.ndarray:
+    """
+    Return the vector of a descriptor element that is expected to have one.
+    """
+    v = d.vector()
+    assert v is not None
+    return v
+
+
 class TestIqrSession (object):
     """
     Unit tests pertaining to the IqrSession class.
@@ -31,6 +49,30 @@ class TestIqrSession (object):
         with self.iqrs as iqrs:
             assert self.iqrs is iqrs
 
+    def test_session_uid(self) -> None:
+        """
+        Test that session UIDs are hex strings, whether generated or given as
+        a ``uuid.UUID``, and that given strings are kept as is.
+        """
+        rrwf = mock.MagicMock(spec=RankRelevancyWithFeedback)
+        uid = uuid.uuid4()
+        assert IqrSession(rrwf, session_uid=uid).uuid == uid.hex
+        assert IqrSession(rrwf, session_uid='abc').uuid == 'abc'
+        generated = self.iqrs.uuid
+        assert isinstance(generated, str)
+        assert generated == uuid.UUID(generated).hex
+
+    def test_logger_cached(self) -> None:
+        """
+        Test that the session logger is looked up once and is named for the
+        session.
+        """
+        with mock.patch('smqtk_iqr.iqr.iqr_session.logging.getLogger') as m_gl:
+            assert self.iqrs._log is self.iqrs._log
+            m_gl.assert_not_called()
+        assert self.iqrs._log.name == \
+            "smqtk_iqr.iqr.iqr_session.IqrSession[%s]" % self.iqrs.uuid
+
     def test_adjudicate_new_pos_neg(self) -> None:
         """
         Test that providing iterables to ``new_positives`` and
@@ -55,6 +97,27 @@ class TestIqrSession (object):
         assert self.iqrs.positive_descriptors == {p0, p2, p3}
         assert self.iqrs.negative_descriptors == {n1, n4}
 
+    def test_adjudicate_non_sequence_iterables(self) -> None:
+        """
+        Test that adjudications may be given as iterables whose truth value is
+        not their emptiness, i.e. generators and numpy arrays.
+        """
+        p0 = DescriptorMemoryElement(0).set_vector([0])
+        p1 = DescriptorMemoryElement(1).set_vector([1])
+        n2 = DescriptorMemoryElement(2).set_vector([2])
+        self.iqrs.adjudicate(new_positives=np.array([p0, p1], dtype=object),
+                             new_negatives=(d for d in [n2]))
+        assert self.iqrs.positive_descriptors == {p0, p1}
+        assert self.iqrs.negative_descriptors == {n2}
+
+        generation = self.iqrs._state_generation
+        # Empty generator and array adjudicate nothing.
+        self.iqrs.adjudicate(new_positives=(d for d in [p0][:0]),
+                             un_negatives=np.array([], dtype=object))
+        assert self.iqrs.positive_descriptors == {p0, p1}
+        assert self.iqrs.negative_descriptors == {n2}
+        assert self.iqrs._state_generation == generation
+
     def test_adjudicate_add_duplicates(self) -> None:
         """
         Test that adding duplicate descriptors as positive or negative
@@ -214,6 +277,7 @@ class TestIqrSession (object):
         # Set initial state
         self.iqrs.positive_descriptors = {p0, p1, p2}
         self.iqrs.negative_descriptors = {n3, n4}
+        generation = self.iqrs._state_generation
 
         # Empty adjudication
         self.iqrs.adjudicate()
@@ -226,13 +290,19 @@ class TestIqrSession (object):
         assert self.iqrs.positive_descriptors == {p0, p1, p2}
         assert self.iqrs.negative_descriptors == {n3, n4}
 
+        # Re-adjudicating existing labels is also no change.
+        self.iqrs.adjudicate(new_positives=[p0], new_negatives=[n3])
+        assert self.iqrs.positive_descriptors == {p0, p1, p2}
+        assert self.iqrs.negative_descriptors == {n3, n4}
+        assert self.iqrs._state_generation == generation
+
     def test_adjudicate_cache_resetting_positive(self) -> None:
         """
         Test results view cache resetting functionality on adjudicating certain
         ways.
         """
         e = DescriptorMemoryElement(0).set_vector([0])
-        a = [(DescriptorMemoryElement(0), 1.0), (DescriptorMemoryElement(0), 2.0)]
+        a = ((DescriptorMemoryElement(0), 1.0), (DescriptorMemoryElement(0), 2.0))
         self.iqrs._ordered_pos = a
         self.iqrs._ordered_neg = a
         self.iqrs._ordered_non_adj = a
@@ -250,7 +320,7 @@ class TestIqrSession (object):
         ways.
         """
         e = DescriptorMemoryElement(0).set_vector([0])
-        a = [(DescriptorMemoryElement(0), 1.0), (DescriptorMemoryElement(0), 2.0)]
+        a = ((DescriptorMemoryElement(0), 1.0), (DescriptorMemoryElement(0), 2.0))
         self.iqrs._ordered_pos = a
         self.iqrs._ordered_neg = a
         self.iqrs._ordered_non_adj = a
@@ -268,7 +338,7 @@ class TestIqrSession (object):
         change occurs under different circumstances
         """
         # setup initial IQR session state.
-        a = [(DescriptorMemoryElement(0), 1.0), (DescriptorMemoryElement(0), 2.0)]
+        a = ((DescriptorMemoryElement(0), 1.0), (DescriptorMemoryElement(0), 2.0))
         p0 = DescriptorMemoryElement(0).set_vector([0])
         p1 = DescriptorMemoryElement(1).set_vector([1])
         p2 = DescriptorMemoryElement(2).set_vector([2])
@@ -305,6 +375,36 @@ class TestIqrSession (object):
         assert self.iqrs._ordered_neg is not None  # NOT reset
         assert self.iqrs._ordered_non_adj is not None  # NOT reset
 
+    def test_adjudication_union_cache(self) -> None:
+        """
+        Test that the cached positive/negative unions are reused until
+        adjudications or external descriptors change.
+        """
+        p0 = DescriptorMemoryElement(0).set_vector([0])
+        n1 = DescriptorMemoryElement(1).set_vector([1])
+        e2 = DescriptorMemoryElement(2).set_vector([2])
+
+        self.iqrs.adjudicate(new_positives=[p0], new_negatives=[n1])
+        pos_u = self.iqrs._get_pos_union()
+        neg_u = self.iqrs._get_neg_union()
+        assert pos_u == {p0}
+        assert neg_u == {n1}
+        assert self.iqrs._get_pos_union() is pos_u
+
+        # No effective change keeps the caches.
+        self.iqrs.adjudicate(new_positives=[p0])
+        assert self.iqrs._get_pos_union() is pos_u
+        assert self.iqrs._get_neg_union() is neg_u
+
+        self.iqrs.external_descriptors(positive=[e2])
+        assert self.iqrs._get_pos_union() == {p0, e2}
+
+        self.iqrs.adjudicate(un_negatives=[n1])
+        assert self.iqrs._get_neg_union() == set()
+
+        self.iqrs.reset()
+        assert self.iqrs._get_pos_union() == set()
+
     def test_update_working_set_no_pos(self) -> None:
         """
         Working set updating should fail when there are no positive examples
@@ -344,6 +444,65 @@ class TestIqrSession (object):
         assert len(self.iqrs.working_set) == 3
         assert set(self.iqrs.working_set.descriptors()) == {d0, d1, d2}
 
+    def test_update_working_set_seeds_queried_once(self) -> None:
+        """
+        Test that positives already used to query the index are not queried
+        again on subsequent updates.
+        """
+        d0 = DescriptorMemoryElement(0).set_vector([0])
+        d1 = DescriptorMemoryElement(1).set_vector([1])
+
+        nn_index: NearestNeighborsIndex = mock.Mock(spec=NearestNeighborsIndex)
+        nn_index.nn = mock.Mock(side_effect=lambda d, n: ([d], [0.]))  # type: ignore
+
+        self.iqrs.adjudicate(new_positives=[d0])
+        self.iqrs.update_working_set(nn_index)
+        nn_index.nn.assert_called_once_with(d0, n=self.iqrs.pos_seed_neighbors)  # type: ignore
+
+        nn_index.nn.reset_mock()  # type: ignore
+        self.iqrs.adjudicate(new_positives=[d1])
+        self.iqrs.update_working_set(nn_index)
+        nn_index.nn.assert_called_once_with(d1, n=self.iqrs.pos_seed_neighbors)  # type: ignore
+
+        nn_index.nn.reset_mock()  # type: ignore
+        self.iqrs.update_working_set(nn_index)
+        nn_index.nn.assert_not_called()  # type: ignore
+        assert set(self.iqrs.working_set.descriptors()) == {d0, d1}
+
+    def test_working_set_matrix(self) -> None:
+        """
+        Test that the working set vector matrix grows with working set updates
+        and is resynchronized when the working set is modified directly.
+        """
+        descrs = [DescriptorMemoryElement(i).set_vector([i, i])
+                  for i in range(20)]
+        nn_index: NearestNeighborsIndex = mock.Mock(spec=NearestNeighborsIndex)
+        nn_index.nn = mock.Mock(side_effect=lambda d, n: (descrs, [0.] * 20))  # type: ignore
+
+        self.iqrs.adjudicate(new_positives=[descrs[0]])
+        self.iqrs.update_working_set(nn_index)
+        assert self.iqrs._ws_len == 20
+        assert self.iqrs._ws_matrix is not None
+        assert len(self.iqrs._ws_matrix) >= 20
+        np.testing.assert_array_equal(self.iqrs._ws_matrix[:20],
+                                      [[i, i] for i in range(20)])
+
+        # Direct modification is picked up by the next refine.
+        extra = DescriptorMemoryElement(20).set_vector([20, 20])
+        self.iqrs.working_set.add_descriptor(extra)
+        self.iqrs.rank_relevancy_with_feedback = mock.MagicMock(
+            spec=RankRelevancyWithFeedback)
+        self.iqrs.rank_relevancy_with_feedback.rank_with_feedback.return_value = (  # type: ignore
+            [0.5] * 21, [])
+        self.iqrs.refine()
+        assert self.iqrs._ws_len == 21
+        assert self.iqrs.results is not None
+        assert set(self.iqrs.results) == set(descrs) | {extra}
+
+        self.iqrs.reset()
+        assert self.iqrs._ws_matrix is None
+        assert self.iqrs._ws_len == 0
+
     def test_refine_no_pos(self) -> None:
         """
         Test that refinement cannot occur if there are no positive descriptor
@@ -403,14 +562,20 @@ class TestIqrSession (object):
         #   external/adjudicated descriptor elements.
         # - ``results`` attribute now has a dict value
         # - value of ``results`` attribute is what we expect.
+        # - vectors are passed as stacked matrices.
         pool_uids, pool_de = zip(*self.iqrs.working_set.items())
         pool = [de.vector() for de in pool_de]
-        self.iqrs.rank_relevancy_with_feedback.rank_with_feedback.assert_called_once_with(  # type: ignore
-            [test_in_pos_elem.vector(), test_ex_pos_elem.vector()],
-            [test_in_neg_elem.vector(), test_ex_neg_elem.vector()],
-            pool,
-            pool_uids
+        rwf = self.iqrs.rank_relevancy_with_feedback.rank_with_feedback
+        rwf.assert_called_once()  # type: ignore
+        c_pos, c_neg, c_pool, c_pool_uids = rwf.call_args[0]  # type: ignore
+        np.testing.assert_array_equal(
+            c_pos, [_vector(test_in_pos_elem), _vector(test_ex_pos_elem)]
+        )
+        np.testing.assert_array_equal(
+            c_neg, [_vector(test_in_neg_elem), _vector(test_ex_neg_elem)]
         )
+        np.testing.assert_array_equal(c_pool, pool)
+        assert c_pool_uids == pool_uids
         assert self.iqrs.results is not None
         assert len(self.iqrs.results) == 3
         assert test_other_elem in self.iqrs.results
@@ -420,7 +585,8 @@ class TestIqrSession (object):
         assert self.iqrs.results[test_other_elem] == 0.5
         assert self.iqrs.results[test_in_pos_elem] == 0.5
         assert self.iqrs.results[test_in_neg_elem] == 0.5
-        assert self.iqrs.feedback_list == desc_list
+        assert self.iqrs.feedback_list == tuple(pool_ids)
+        assert self.iqrs.feedback_results() == tuple(desc_list)
 
     def test_refine_with_prev_results(self) -> None:
         """
@@ -457,9 +623,9 @@ class TestIqrSession (object):
         }
 
         # Create a "previous state" of the feedback results.
-        self.iqrs.feedback_list = [test_ex_pos_elem,
-                                   test_ex_neg_elem,
-                                   test_other_elem]
+        self.iqrs.feedback_list = (test_ex_pos_elem.uuid(),
+                                   test_ex_neg_elem.uuid(),
+                                   test_other_elem.uuid())
 
         # Prepare IQR state for refinement
         # - set dummy internal/external positive negatives.
@@ -478,14 +644,20 @@ class TestIqrSession (object):
         #   external/adjudicated descriptor elements.
         # - ``results`` attribute now has an dict value
         # - value of ``results`` attribute is what we expect.
+        # - vectors are passed as stacked matrices.
         pool_uids, pool_de = zip(*self.iqrs.working_set.items())
         pool = [de.vector() for de in pool_de]
-        self.iqrs.rank_relevancy_with_feedback.rank_with_feedback.assert_called_once_with(  # type: ignore
-            [test_in_pos_elem.vector(), test_ex_pos_elem.vector()],
-            [test_in_neg_elem.vector(), test_ex_neg_elem.vector()],
-            pool,
-            pool_uids
+        rwf = self.iqrs.rank_relevancy_with_feedback.rank_with_feedback
+        rwf.assert_called_once()  # type: ignore
+        c_pos, c_neg, c_pool, c_pool_uids = rwf.call_args[0]  # type: ignore
+        np.testing.assert_array_equal(
+            c_pos, [_vector(test_in_pos_elem), _vector(test_ex_pos_elem)]
         )
+        np.testing.assert_array_equal(
+            c_neg, [_vector(test_in_neg_elem), _vector(test_ex_neg_elem)]
+        )
+        np.testing.assert_array_equal(c_pool, pool)
+        assert c_pool_uids == pool_uids
         assert self.iqrs.results is not None
         assert len(self.iqrs.results) == 3
         assert test_other_elem in self.iqrs.results
@@ -496,29 +668,153 @@ class TestIqrSession (object):
         assert self.iqrs.results[test_other_elem] == 0.5
         assert self.iqrs.results[test_in_pos_elem] == 0.5
         assert self.iqrs.results[test_in_neg_elem] == 0.5
-        assert self.iqrs.feedback_list == desc_list
+        assert self.iqrs.feedback_list == tuple(pool_ids)
+        assert self.iqrs.feedback_results() == tuple(desc_list)
+
+    def test_refine_discard_stale(self) -> None:
+        """
+        Test that results are not published if the adjudication state changes
+        while ranking is occurring outside of the session lock.
+        """
+        test_pos_elem = DescriptorMemoryElement(0).set_vector([0])
+        test_neg_elem = DescriptorMemoryElement(1).set_vector([1])
+        test_other_elem = DescriptorMemoryElement(2).set_vector([2])
+        desc_list = [test_pos_elem, test_neg_elem, test_other_elem]
+        self.iqrs.working_set.add_many_descriptors(desc_list)
+        self.iqrs.adjudicate(new_positives=[test_pos_elem],
+                             new_negatives=[test_neg_elem])
+
+        def rank_and_adjudicate(*_: object) -> object:
+            # Simulate another client adjudicating mid-refinement.
+            self.iqrs.adjudicate(new_positives=[test_other_elem])
+            return [0.5, 0.5, 0.5], [de.uuid() for de in desc_list]
+
+        rwf = self.iqrs.rank_relevancy_with_feedback.rank_with_feedback
+        rwf.side_effect = rank_and_adjudicate  # type: ignore
+        self.iqrs.refine()
+
+        assert self.iqrs.results is None
+        assert self.iqrs.feedback_list is None
+        assert self.iqrs.rank_contrib_pos == set()
+
+    def test_refine_concurrent_reset(self) -> None:
+        """
+        Test that a reset from another thread while refinement is fetching
+        vectors outside of the session lock does not fail refinement, but
+        only discards its results.
+        """
+        descs = [DescriptorMemoryElement(i).set_vector(np.array([i]))
+                 for i in range(7)]
+        self.iqrs.working_set.add_many_descriptors(descs)
+        self.iqrs.rank_relevancy_with_feedback.rank_with_feedback.return_value = (  # type: ignore
+            [0.5] * 7, []
+        )
+        # Cache the vectors of some adjudications, then add two more not yet
+        # cached per set so that they are fetched together.
+        self.iqrs.adjudicate(new_positives=descs[:1],
+                             new_negatives=descs[3:4])
+        self.iqrs.refine()
+        self.iqrs.adjudicate(new_positives=descs[1:3],
+                             new_negatives=descs[4:6])
+        real_get_many_vectors = DescriptorElement.get_many_vectors
+
+        def get_many_and_reset(descriptors: Iterable[DescriptorElement]) -> object:
+            # Fetch the vectors before the reset clears the vector cache.
+            vectors = real_get_many_vectors(descriptors)
+            t = threading.Thread(target=self.iqrs.reset)
+            t.start()
+            t.join(5)
+            assert not t.is_alive()
+            return vectors
+
+        with mock.patch.object(DescriptorElement, 'get_many_vectors',
+                               side_effect=get_many_and_reset):
+            self.iqrs.refine()
+
+        assert self.iqrs.results is None
+        assert not self.iqrs.positive_descriptors
+
+    def test_stack_vectors_single_missing_no_vector(self) -> None:
+        """
+        Test that a single descriptor without a vector among cached ones is
+        rejected by refinement and state serialization, and is not cached.
+        """
+        descs = [DescriptorMemoryElement(i).set_vector(np.array([i]))
+                 for i in range(3)]
+        ext = DescriptorMemoryElement('ext').set_vector(np.array([3]))
+        self.iqrs.working_set.add_many_descriptors(descs)
+        self.iqrs.rank_relevancy_with_feedback.rank_with_feedback.return_value = (  # type: ignore
+            [0.5] * 3, []
+        )
+        self.iqrs.adjudicate(new_positives=descs[:1],
+                             new_negatives=descs[1:2])
+        self.iqrs.external_descriptors(positive=[ext])
+        # Cache the vectors of the current adjudications.
+        self.iqrs.refine()
+        assert set(self.iqrs._vector_cache) == {0, 1, 'ext'}
+
+        no_vec = DescriptorMemoryElement('no-vec')
+        self.iqrs.external_descriptors(positive=[no_vec])
+        with pytest.raises(ValueError, match="Descriptor 'no-vec' has no vector."):
+            self.iqrs.refine()
+        with pytest.raises(ValueError, match="Descriptor 'no-vec' has no vector."):
+            self.iqrs.get_state_bytes()
+        assert 'no-vec' not in self.iqrs._vector_cache
+
+    def test_refine_rank_contrib_snapshots(self) -> None:
+        """
+        Test that refinement records frozen snapshots of the contributing
+        descriptor sets along with their precomputed unions.
+        """
+        test_pos_elem = DescriptorMemoryElement(0).set_vector([0])
+        test_neg_elem = DescriptorMemoryElement(1).set_vector([1])
+        test_other_elem = DescriptorMemoryElement(2).set_vector([2])
+        desc_list = [test_pos_elem, test_neg_elem, test_other_elem]
+        self.iqrs.working_set.add_many_descriptors(desc_list)
+        self.iqrs.rank_relevancy_with_feedback.rank_with_feedback.return_value = (  # type: ignore
+            [0.5, 0.5, 0.5], []
+        )
+
+        self.iqrs.adjudicate(new_positives=[test_pos_elem],
+                             new_negatives=[test_neg_elem])
+        self.iqrs.refine()
+        assert isinstance(self.iqrs.rank_contrib_pos, frozenset)
+        assert self.iqrs.rank_contrib_pos == {test_pos_elem}
+        assert self.iqrs.rank_contrib_neg == {test_neg_elem}
+        assert self.iqrs._rank_contrib_pos_all == {test_pos_elem}
+        assert self.iqrs._rank_contrib_neg_all == {test_neg_elem}
+        assert self.iqrs._rank_contrib_all == {test_pos_elem, test_neg_elem}
+
+        # Adjudications after refinement do not alter the snapshots.
+        self.iqrs.adjudicate(new_positives=[test_neg_elem])
+        assert self.iqrs.rank_contrib_pos == {test_pos_elem}
+        assert self.iqrs.rank_contrib_neg == {test_neg_elem}
+
+        self.iqrs.reset()
+        assert self.iqrs.rank_contrib_pos == frozenset()
+        assert self.iqrs._rank_contrib_all is None
 
     def test_ordered_results_no_results_no_cache(self) -> None:
         """
-        Test that an empty list is returned when ``ordered_results`` is called
+        Test that an empty tuple is returned when ``ordered_results`` is called
         before any refinement has occurred.
         """
-        assert self.iqrs.ordered_results() == []
+        assert self.iqrs.ordered_results() == ()
 
     def test_ordered_results_has_cache(self) -> None:
         """
-        Test that a shallow copy of the cached list is returned when there is
-        a cache.
+        Test that the cached tuple is returned directly when there is a
+        cache.
         """
         # Simulate there being a cache
-        self.iqrs._ordered_pos = ['simulated', 'cache']  # type: ignore
+        self.iqrs._ordered_pos = ('simulated', 'cache')  # type: ignore
         actual = self.iqrs.get_positive_adjudication_relevancy()
         assert actual == self.iqrs._ordered_pos
-        assert id(actual) != id(self.iqrs._ordered_pos)
+        assert actual is self.iqrs._ordered_pos
 
     def test_ordered_results_has_results_no_cache(self) -> None:
         """
-        Test that an appropriate list is returned by ``ordered_results`` after
+        Test that an appropriate tuple is returned by ``ordered_results`` after
         a refinement has occurred.
         """
 
@@ -542,7 +838,7 @@ class TestIqrSession (object):
             actual1 = self.iqrs.ordered_results()
             m_sorted.assert_called_once()
 
-        expected = [(d1, 0.8), (d3, 0.4), (d2, 0.2), (d0, 0.0)]
+        expected = ((d1, 0.8), (d3, 0.4), (d2, 0.2), (d0, 0.0))
         assert actual1 == expected
 
         # Calling the method a second time should not result in a ``sorted``
@@ -552,13 +848,88 @@ class TestIqrSession (object):
             m_sorted.assert_not_called()
 
         assert actual2 == expected
-        # Both returns should be shallow copies, thus not the same list
-        # instances.
-        assert id(actual1) != id(actual2)
+        # The cached, immutable tuple is returned directly.
+        assert actual2 is actual1
+
+    def test_ordered_results_argsort(self) -> None:
+        """
+        Test that large result sets are ordered with numpy and match the
+        ``sorted`` ordering, including the order of tied scores.
+        """
+        scores = np.random.RandomState(0).randint(0, 10, 100) / 10.
+        self.iqrs.results = {
+            DescriptorMemoryElement(i): sc for i, sc in enumerate(scores)
+        }  # type: ignore
+        expected = tuple(sorted(self.iqrs.results.items(),
+                                key=lambda p: p[1], reverse=True))
+        with mock.patch.object(IqrSession, 'ORDERED_RESULTS_ARGSORT_MIN', 10), \
+                mock.patch('smqtk_iqr.iqr.iqr_session.sorted') as m_sorted:
+            actual = self.iqrs.ordered_results()
+            m_sorted.assert_not_called()
+        assert actual == expected
+
+    def test_ordered_results_top_k(self) -> None:
+        """
+        Test that requesting the top ``k`` results selects the highest scoring
+        elements without sorting or caching the full ordering, and that the
+        full cache is sliced when present.
+        """
+        d0 = DescriptorMemoryElement(0).set_vector([0])
+        d1 = DescriptorMemoryElement(1).set_vector([1])
+        d2 = DescriptorMemoryElement(2).set_vector([2])
+        d3 = DescriptorMemoryElement(3).set_vector([3])
+        self.iqrs.results = {
+            d0: 0.0,
+            d1: 0.8,
+            d2: 0.2,
+            d3: 0.4,
+        }
+        self.iqrs.rank_contrib_pos = {d1, d2}
+        self.iqrs.rank_contrib_neg = {d0}
+
+        with mock.patch('smqtk_iqr.iqr.iqr_session.sorted') as m_sorted:
+            assert self.iqrs.ordered_results(k=2) == ((d1, 0.8), (d3, 0.4))
+            assert self.iqrs.get_positive_adjudication_relevancy(k=1) == \
+                ((d1, 0.8),)
+            assert self.iqrs.get_negative_adjudication_relevancy(k=5) == \
+                ((d0, 0.0),)
+            assert self.iqrs.get_unadjudicated_relevancy(k=5) == \
+                ((d3, 0.4),)
+            m_sorted.assert_not_called()
+        assert self.iqrs._ordered_results is None
+        assert self.iqrs._ordered_pos is None
+        assert self.iqrs._ordered_non_adj is None
+
+        full = self.iqrs.ordered_results()
+        assert self.iqrs.ordered_results(k=3) == full[:3]
+
+    def test_ordered_results_negative_k(self) -> None:
+        """
+        Test that a negative ``k`` is rejected whether or not the result views
+        are cached.
+        """
+        d0 = DescriptorMemoryElement(0).set_vector([0])
+        d1 = DescriptorMemoryElement(1).set_vector([1])
+        self.iqrs.results = {d0: 0.0, d1: 0.8}
+        self.iqrs.rank_contrib_pos = {d1}
+        getters = (
+            self.iqrs.ordered_results,
+            self.iqrs.get_positive_adjudication_relevancy,
+            self.iqrs.get_negative_adjudication_relevancy,
+            self.iqrs.get_unadjudicated_relevancy,
+        )
+        for getter in getters:
+            with pytest.raises(ValueError, match="non-negative"):
+                getter(k=-1)
+            # Populate the view cache and check again.
+            getter()
+            with pytest.raises(ValueError, match="non-negative"):
+                getter(k=-1)
+            assert getter(k=0) == ()
 
     def test_ordered_results_has_results_post_reset(self) -> None:
         """
-        Test that an empty list is returned after a reset where there was a
+        Test that an empty tuple is returned after a reset where there was a
         cached value before the reset.
         """
 
@@ -581,7 +952,7 @@ class TestIqrSession (object):
 
         # Post-reset, there should be no results nor cache.
         actual = self.iqrs.ordered_results()
-        assert actual == []
+        assert actual == ()
 
     def test_feedback_results_weird_state(self) -> None:
         """
@@ -602,25 +973,28 @@ class TestIqrSession (object):
 
     def test_feedback_results_no_results_no_cache(self) -> None:
         """
-        Test that an empty list is returned when ``feedback_results`` is called
-        before any refinement has occurred.
+        Test that an empty tuple is returned when ``feedback_results`` is
+        called before any refinement has occurred.
         """
-        assert self.iqrs.feedback_results() == []
+        assert self.iqrs.feedback_results() == ()
 
     def test_feedback_results_has_cache(self) -> None:
         """
-        Test that a shallow copy of the cached list is returned when there is
-        a cache.
+        Test that feedback UIDs are resolved to working set descriptors once
+        and the resolved tuple is returned directly thereafter.
         """
-        # Simulate there being a cache
-        self.iqrs.feedback_list = ['simulated', 'cache']  # type: ignore
+        d0 = DescriptorMemoryElement(0).set_vector([0])
+        d1 = DescriptorMemoryElement(1).set_vector([1])
+        self.iqrs.working_set.add_many_descriptors([d0, d1])
+        self.iqrs.feedback_list = (1, 0)
         actual = self.iqrs.feedback_results()
-        assert actual == self.iqrs.feedback_list
-        assert id(actual) != id(self.iqrs.feedback_list)
+        assert actual == (d1, d0)
+        assert self.iqrs._feedback_resolved is actual
+        assert self.iqrs.feedback_results() is actual
 
     def test_feedback_results_has_results_post_reset(self) -> None:
         """
-        Test that an empty list is returned after a reset where there was a
+        Test that an empty tuple is returned after a reset where there was a
         cached value before the reset.
         """
 
@@ -629,12 +1003,8 @@ class TestIqrSession (object):
         d1 = DescriptorMemoryElement(1).set_vector([1])
         d2 = DescriptorMemoryElement(2).set_vector([2])
         d3 = DescriptorMemoryElement(3).set_vector([3])
-        self.iqrs.feedback_list = [
-            d0,
-            d1,
-            d2,
-            d3,
-        ]
+        self.iqrs.working_set.add_many_descriptors([d0, d1, d2, d3])
+        self.iqrs.feedback_list = (0, 1, 2, 3)
 
         # Initial call to ``ordered_results`` should have a non-None return.
         assert self.iqrs.feedback_results() is not None
@@ -643,25 +1013,24 @@ class TestIqrSession (object):
 
         # Post-reset, there should be no results nor cache.
         actual = self.iqrs.feedback_results()
-        assert actual == []
+        assert actual == ()
 
     def test_get_positive_adjudication_relevancy_has_cache(self) -> None:
         """
-        Test that a shallow copy of the cached list is returned if there is a
-        cache.
+        Test that the cached tuple is returned directly if there is a cache.
         """
 
-        self.iqrs._ordered_pos = ['simulation', 'cache']  # type: ignore
+        self.iqrs._ordered_pos = ('simulation', 'cache')  # type: ignore
         actual = self.iqrs.get_positive_adjudication_relevancy()
-        assert actual == ['simulation', 'cache']
-        assert id(actual) != id(self.iqrs._ordered_pos)
+        assert actual == ('simulation', 'cache')
+        assert actual is self.iqrs._ordered_pos
 
     def test_get_positive_adjudication_relevancy_no_cache_no_results(self) -> None:
         """
         Test that ``get_positive_adjudication_relevancy`` returns None when in a
         pre-refine state when there are no positive adjudications.
         """
-        assert self.iqrs.get_positive_adjudication_relevancy() == []
+        assert self.iqrs.get_positive_adjudication_relevancy() == ()
 
     def test_get_positive_adjudication_relevancy_no_cache_has_results(self) -> None:
         """
@@ -695,7 +1064,7 @@ class TestIqrSession (object):
             actual1 = self.iqrs.get_positive_adjudication_relevancy()
             m_sorted.assert_called_once()
 
-        expected = [(d1, 0.8), (d3, 0.4)]
+        expected = ((d1, 0.8), (d3, 0.4))
         assert actual1 == expected
 
         # Calling the method a second time should not result in a ``sorted``
@@ -706,26 +1075,24 @@ class TestIqrSession (object):
             m_sorted.assert_not_called()
 
         assert actual2 == expected
-        # Both returns should be shallow copies, thus not the same list
-        # instances.
-        assert id(actual1) != id(actual2)
+        # The cached, immutable tuple is returned directly.
+        assert actual2 is actual1
 
     def test_get_negative_adjudication_relevancy_has_cache(self) -> None:
         """
-        Test that a shallow copy of the cached list is returned if there is a
-        cache.
+        Test that the cached tuple is returned directly if there is a cache.
         """
-        self.iqrs._ordered_neg = ['simulation', 'cache']  # type: ignore
+        self.iqrs._ordered_neg = ('simulation', 'cache')  # type: ignore
         actual = self.iqrs.get_negative_adjudication_relevancy()
-        assert actual == ['simulation', 'cache']
-        assert id(actual) != id(self.iqrs._ordered_neg)
+        assert actual == ('simulation', 'cache')
+        assert actual is self.iqrs._ordered_neg
 
     def test_get_negative_adjudication_relevancy_no_cache_no_results(self) -> None:
         """
         Test that ``get_negative_adjudication_relevancy`` returns None when in a
         pre-refine state when there are no negative adjudications.
         """
-        assert self.iqrs.get_negative_adjudication_relevancy() == []
+        assert self.iqrs.get_negative_adjudication_relevancy() == ()
 
     def test_get_negative_adjudication_relevancy_no_cache_has_results(self) -> None:
         """
@@ -759,7 +1126,7 @@ class TestIqrSession (object):
             actual1 = self.iqrs.get_negative_adjudication_relevancy()
             m_sorted.assert_called_once()
 
-        expected = [(d2, 0.2), (d0, 0.1)]
+        expected = ((d2, 0.2), (d0, 0.1))
         assert actual1 == expected
 
         # Calling the method a second time should not result in a ``sorted``
@@ -770,26 +1137,24 @@ class TestIqrSession (object):
             m_sorted.assert_not_called()
 
         assert actual2 == expected
-        # Both returns should be shallow copies, thus not the same list
-        # instances.
-        assert id(actual1) != id(actual2)
+        # The cached, immutable tuple is returned directly.
+        assert actual2 is actual1
 
     def test_get_unadjudicated_relevancy_has_cache(self) -> None:
         """
-        Test that a shallow copy of the cached list is returned if there is a
-        cache.
+        Test that the cached tuple is returned directly if there is a cache.
         """
-        self.iqrs._ordered_non_adj = ['simulation', 'cache']  # type: ignore
+        self.iqrs._ordered_non_adj = ('simulation', 'cache')  # type: ignore
         actual = self.iqrs.get_unadjudicated_relevancy()
-        assert actual == ['simulation', 'cache']
-        assert id(actual) != id(self.iqrs._ordered_non_adj)
+        assert actual == ('simulation', 'cache')
+        assert actual is self.iqrs._ordered_non_adj
 
     def test_get_unadjudicated_relevancy_no_cache_no_results(self) -> None:
         """
         Test that ``get_unadjudicated_relevancy`` returns None when in a
         pre-refine state when there is results state.
         """
-        assert self.iqrs.get_unadjudicated_relevancy() == []
+        assert self.iqrs.get_unadjudicated_relevancy() == ()
 
     def test_get_unadjudicated_relevancy_no_cache_has_results(self) -> None:
         """
@@ -823,7 +1188,7 @@ class TestIqrSession (object):
             actual1 = self.iqrs.get_unadjudicated_relevancy()
             m_sorted.assert_called_once()
 
-        expected = [(d3, 0.4), (d2, 0.2)]
+        expected = ((d3, 0.4), (d2, 0.2))
         assert actual1 == expected
 
         # Calling the method a second time should not result in a ``sorted``
@@ -834,9 +1199,39 @@ class TestIqrSession (object):
             m_sorted.assert_not_called()
 
         assert actual2 == expected
-        # Both returns should be shallow copies, thus not the same list
-        # instances.
-        assert id(actual1) != id(actual2)
+        # The cached, immutable tuple is returned directly.
+        assert actual2 is actual1
+
+    def test_adjudication_relevancy_partitions_single_pass(self) -> None:
+        """
+        Test that computing one adjudication relevancy view populates the
+        positive, negative and non-adjudicated caches together.
+        """
+        d0 = DescriptorMemoryElement(0).set_vector([0])
+        d1 = DescriptorMemoryElement(1).set_vector([1])
+        d2 = DescriptorMemoryElement(2).set_vector([2])
+        d3 = DescriptorMemoryElement(3).set_vector([3])
+        self.iqrs.rank_contrib_pos = {d1}
+        self.iqrs.rank_contrib_neg = {d0}
+        self.iqrs.rank_contrib_neg_ext = {d1}
+        self.iqrs.results = {
+            d0: 0.1,
+            d1: 0.8,
+            d2: 0.2,
+            d3: 0.4,
+        }
+
+        assert self.iqrs.get_unadjudicated_relevancy() == ((d3, 0.4), (d2, 0.2))
+        # An element may be in both pos and neg views via an external
+        # adjudication.
+        assert self.iqrs._ordered_pos == ((d1, 0.8),)
+        assert self.iqrs._ordered_neg == ((d1, 0.8), (d0, 0.1))
+
+        with mock.patch('smqtk_iqr.iqr.iqr_session.sorted') as m_sorted:
+            assert self.iqrs.get_positive_adjudication_relevancy() == ((d1, 0.8),)
+            assert self.iqrs.get_negative_adjudication_relevancy() == \
+                ((d1, 0.8), (d0, 0.1))
+            m_sorted.assert_not_called()
 
     def test_reset_result_cache_invalidation(self) -> None:
         """
@@ -878,6 +1273,131 @@ class TestIqrSession (object):
         assert self.iqrs.external_positive_descriptors == new_iqrs.external_positive_descriptors
         assert self.iqrs.external_negative_descriptors == new_iqrs.external_negative_descriptors
 
+    def test_get_state_batch_vectors(self) -> None:
+        """
+        Test that vectors not yet cached are retrieved in a single batch call
+        per descriptor set when getting state bytes.
+        """
+        descrs = [DescriptorMemoryElement(i).set_vector([i]) for i in range(3)]
+        self.iqrs.positive_descriptors.update(descrs)
+
+        with mock.patch.object(DescriptorElement, 'get_many_vectors',
+                               wraps=DescriptorElement.get_many_vectors) as m_gmv:
+            self.iqrs.get_state_bytes()
+            m_gmv.assert_called_once()
+            # Vectors are cached afterwards.
+            self.iqrs.get_state_bytes()
+            m_gmv.assert_called_once()
+
+    def test_get_state_bytes_async(self) -> None:
+        """
+        Test that asynchronously serialized state reflects the session at the
+        time of the call, not at the time of serialization.
+        """
+        d0 = DescriptorMemoryElement(0).set_vector([0])
+        d1 = DescriptorMemoryElement(1).set_vector([1])
+        self.iqrs.adjudicate(new_positives=[d0])
+
+        executor = mock.Mock(spec=Executor)
+        f = self.iqrs.get_state_bytes_async(executor)
+        assert f is executor.submit.return_value
+        executor.submit.assert_called_once()
+        # Modify state before the submitted serialization work is run.
+        self.iqrs.adjudicate(new_positives=[d1])
+        fn, snapshot = executor.submit.call_args[0]
+        b = fn(snapshot)
+
+        new_iqrs = IqrSession(mock.MagicMock(spec=RankRelevancyWithFeedback))
+        new_iqrs.set_state_bytes(
+            b, DescriptorElementFactory(DescriptorMemoryElement, {}))
+        assert new_iqrs.positive_descriptors == {d0}
+
+    def test_get_set_state_stdlib_json(self) -> None:
+        """
+        Test that state round-trips when falling back to the standard library
+        json module, as when ``orjson`` is not installed.
+        """
+        d0 = DescriptorMemoryElement(0).set_vector([0])
+        # Beyond the 64-bit integer range supported by orjson.
+        d1 = DescriptorMemoryElement(2**70).set_vector([1])
+        self.iqrs.positive_descriptors.update({d0})
+        self.iqrs.negative_descriptors.update({d1})
+
+        with mock.patch('smqtk_iqr.utils.fast_json.orjson', None):
+            b = self.iqrs.get_state_bytes()
+            descr_fact = DescriptorElementFactory(DescriptorMemoryElement, {})
+            new_iqrs = IqrSession(mock.MagicMock(spec=RankRelevancyWithFeedback))
+            new_iqrs.set_state_bytes(b, descr_fact)
+
+        assert new_iqrs.positive_descriptors == {d0}
+        assert new_iqrs.negative_descriptors == {d1}
+
+    def test_set_state_legacy_json(self) -> None:
+        """
+        Test that state bytes in the previous format, with vectors encoded in
+        the JSON file, can still be loaded.
+        """
+        z_buffer = io.BytesIO()
+        with zipfile.ZipFile(z_buffer, 'w') as z:
+            z.writestr(IqrSession.STATE_ZIP_FILENAME, json.dumps({
+                'pos': [[0, [0.0, 1.0]]],
+                'neg': [[1, [1.0, 0.0]]],
+                'external_pos': [],
+                'external_neg': [['ext', [0.5, 0.5]]],
+            }))
+
+        descr_fact = DescriptorElementFactory(DescriptorMemoryElement, {})
+        self.iqrs.set_state_bytes(z_buffer.getvalue(), descr_fact)
+
+        assert {d.uuid() for d in self.iqrs.positive_descriptors} == {0}
+        assert {d.uuid() for d in self.iqrs.negative_descriptors} == {1}
+        assert self.iqrs.external_positive_descriptors == set()
+        ext_neg, = self.iqrs.external_negative_descriptors
+        assert ext_neg.uuid() == 'ext'
+        np.testing.assert_array_equal(_vector(ext_neg), [0.5, 0.5])
+
+    def test_get_state_vector_entries(self) -> None:
+        """
+        Test that state vectors are stored as uncompressed ``.npy`` matrices
+        parallel to the UIDs recorded in the state JSON.
+        """
+        d0 = DescriptorMemoryElement(0).set_vector(np.array([0., 1.], dtype=np.float32))
+        self.iqrs.positive_descriptors.add(d0)
+
+        with zipfile.ZipFile(io.BytesIO(self.iqrs.get_state_bytes())) as z:
+            state = json.loads(z.read(IqrSession.STATE_ZIP_FILENAME))
+            assert state['version'] == IqrSession.STATE_VERSION
+            assert state['pos'] == [0]
+            assert state['neg'] == []
+            info = z.getinfo('pos.npy')
+            assert info.compress_type == zipfile.ZIP_STORED
+            with z.open(info) as f:
+                mat = np.load(f, allow_pickle=False)
+        assert mat.dtype == np.float32
+        np.testing.assert_array_equal(mat, [[0., 1.]])
+
+    def test_set_state_missing_vector_entry(self) -> None:
+        """
+        Test that state bytes missing a ``.npy`` vector entry, e.g. from a
+        truncated archive, are rejected with a ValueError and leave the
+        session state untouched.
+        """
+        d0 = DescriptorMemoryElement(0).set_vector([0])
+        self.iqrs.positive_descriptors.add(d0)
+        # Copy all but one vector entry of a valid state.
+        z_buffer = io.BytesIO()
+        with zipfile.ZipFile(io.BytesIO(self.iqrs.get_state_bytes())) as z_in, \
+                zipfile.ZipFile(z_buffer, 'w') as z_out:
+            for name in z_in.namelist():
+                if name != 'neg.npy':
+                    z_out.writestr(name, z_in.read(name))
+
+        descr_fact = DescriptorElementFactory(DescriptorMemoryElement, {})
+        with pytest.raises(ValueError, match="missing vector entry for "
+                                             "state 'neg'"):
+            self.iqrs.set_state_bytes(z_buffer.getvalue(), descr_fact)
+        assert self.iqrs.positive_descriptors == {d0}
+
     def test_refine_no_neg(self) -> None:
         """
         Test refinement without any negative adjudications and ensure that the farthest
@@ -918,7 +1438,8 @@ class TestIqrSession (object):
         # extracting what was passed as the negative descriptor input,
         # which should be populated by the auto-negative selection logic.
         neg_list_arg = self.iqrs.rank_relevancy_with_feedback.rank_with_feedback.call_args[0][1]  # type: ignore
-        assert neg_list_arg == [test_other_elem_far.vector()]
+        np.testing.assert_array_equal(neg_list_arg,
+                                      [_vector(test_other_elem_far)])
 
     def test_refine_neg_autoselect_fail(self) -> None:
         """
@@ -0,0 +1,53 @@
+import unittest
+import unittest.mock as mock
+
+from smqtk_iqr.utils import fast_json
+from smqtk_iqr.utils.fast_json import json_dumps, json_loads
+
+
+class TestFastJson (unittest.TestCase):
+    """ Tests for the JSON encoding helper functions """
+
+    OBJ = {'a': [1, 2.5, None], 'b': {'c': True}, 'd': "é"}
+
+    def test_round_trip(self) -> None:
+        """ Test that objects round trip from bytes and text JSON. """
+        b = json_dumps(self.OBJ)
+        assert isinstance(b, bytes)
+        assert json_loads(b) == self.OBJ
+        assert json_loads(b.decode()) == self.OBJ
+
+    def test_round_trip_stdlib(self) -> None:
+        """ Test that objects round trip when falling back to the standard
+        library json module, as when ``orjson`` is not installed.
+        """
+        with mock.patch('smqtk_iqr.utils.fast_json.orjson', None):
+            b = json_dumps(self.OBJ)
+            assert isinstance(b, bytes)
+            assert json_loads(b) == self.OBJ
+            assert json_loads(b.decode()) == self.OBJ
+
+    def test_dumps_big_int(self) -> None:
+        """ Test that integers beyond 64-bit are still serialized. """
+        assert json_loads(json_dumps([2**70])) == [2**70]
+
+    def test_dumps_non_str_keys(self) -> None:
+        """ Test that non-string dictionary keys are serialized as the
+        standard library json module does.
+        """
+        assert json_loads(json_dumps({1: 'a'})) == {'1': 'a'}
+
+    def test_dumps_not_serializable(self) -> None:
+        """ Test that objects neither module can encode raise TypeError. """
+        with self.assertRaises(TypeError):
+            json_dumps({'a': {1, 2}})
+
+    @unittest.skipIf(fast_json.orjson is None, "orjson is not installed")
+    def test_dumps_no_stdlib_retry(self) -> None:
+        """ Test that encoding is only retried with the standard library json
+        module for errors it is known to handle.
+        """
+        with mock.patch('smqtk_iqr.utils.fast_json.json.dumps') as m_dumps:
+            with self.assertRaises(TypeError):
+                json_dumps({'a': {1, 2}})
+        m_dumps.assert_not_called()
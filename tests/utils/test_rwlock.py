@@ -0,0 +1,84 @@
+import threading
+import unittest
+
+import pytest
+
+from smqtk_iqr.utils.rwlock import RWLock
+
+
+class TestRWLock (unittest.TestCase):
+    """ Tests for the RWLock helper class """
+
+    def test_concurrent_readers(self) -> None:
+        """ Test that multiple threads may hold the read lock at once. """
+        lock = RWLock()
+        n_threads = 4
+        barrier = threading.Barrier(n_threads, timeout=5)
+        entered = []
+
+        def reader() -> None:
+            with lock.read_lock():
+                # Every reader must be inside the lock before any may leave.
+                barrier.wait()
+                entered.append(True)
+
+        threads = [threading.Thread(target=reader) for _ in range(n_threads)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(5)
+        assert len(entered) == n_threads
+
+    def test_writer_excludes_reader(self) -> None:
+        """ Test that a reader blocks while another thread holds the write
+        lock. """
+        lock = RWLock()
+        acquired = threading.Event()
+
+        def reader() -> None:
+            with lock.read_lock():
+                acquired.set()
+
+        with lock.write_lock():
+            t = threading.Thread(target=reader)
+            t.start()
+            assert not acquired.wait(0.1)
+        assert acquired.wait(5)
+        t.join(5)
+
+    def test_write_reentrant(self) -> None:
+        """ Test that the write lock is re-entrant and that the writing thread
+        may also take the read lock, mirroring ``threading.RLock`` usage. """
+        lock = RWLock()
+        with lock:
+            lock.acquire()
+            with lock.read_lock():
+                pass
+            lock.release()
+        # Fully released so another thread may now write.
+        done = threading.Event()
+
+        def writer() -> None:
+            with lock:
+                done.set()
+
+        t = threading.Thread(target=writer)
+        t.start()
+        assert done.wait(5)
+        t.join(5)
+
+    def test_read_upgrade_raises(self) -> None:
+        """ Test that attempting to upgrade a read lock raises instead of
+        deadlocking. """
+        lock = RWLock()
+        with lock.read_lock():
+            with pytest.raises(RuntimeError, match="upgrade"):
+                lock.acquire_write()
+
+    def test_release_unacquired(self) -> None:
+        """ Test that releasing a lock not held raises. """
+        lock = RWLock()
+        with pytest.raises(RuntimeError):
+            lock.release_read()
+        with pytest.raises(RuntimeError):
+            lock.release_write()
@@ -1,4 +1,6 @@
 import unittest
+import unittest.mock as mock
+
 from smqtk_iqr.utils.web import ServiceProxy
 
 
@@ -30,3 +32,24 @@ class TestServiceProxy (unittest.TestCase):
 
         test_url = 'https://this.site/bar'
         assert ServiceProxy(test_url).url == test_url
+
+    def test_session_reused(self) -> None:
+        """ Test that requests are all made through the one session, which has
+        a connection pool of the requested size.
+        """
+        proxy = ServiceProxy('this.site', pool_maxsize=7)
+        adapter = proxy._session.get_adapter('http://this.site/foo')
+        assert adapter._pool_maxsize == 7  # type: ignore
+        with mock.patch.object(proxy, '_session') as m_session:
+            proxy.get('foo', a='1')
+            proxy.post('foo', a='1')
+            proxy.put('foo', a='1')
+            proxy.delete('foo', a='1')
+        m_session.get.assert_called_once_with('http://this.site/foo',
+                                              params={'a': '1'})
+        m_session.post.assert_called_once_with('http://this.site/foo',
+                                               data={'a': '1'})
+        m_session.put.assert_called_once_with('http://this.site/foo',
+                                              data={'a': '1'})
+        m_session.delete.assert_called_once_with('http://this.site/foo',
+                                                 params={'a': '1'})
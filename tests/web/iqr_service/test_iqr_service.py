@@ -661,6 +661,29 @@ class TestIqrService (unittest.TestCase):
             self.assertStatusCode(r, 404)
             self.assertJsonMessageRegex(r, "session id invalid-sid not found")
 
+    def test_refine_and_results_not_locked(self) -> None:
+        """
+        Test that refinement and result views, which lock the session
+        themselves, are called without the handler holding the session lock.
+        """
+        iqrs = IqrSession(mock.MagicMock(spec=RankRelevancyWithFeedback))
+        self.app.controller.has_session_uuid = mock.MagicMock(return_value=True)  # type: ignore
+        self.app.controller.get_session = mock.MagicMock(return_value=iqrs)  # type: ignore
+        held = []
+
+        def record_lock(*_: Any) -> Any:
+            held.append(iqrs.lock._writer is not None or bool(iqrs.lock._readers))
+            return ()
+
+        with mock.patch.object(iqrs, 'refine', side_effect=record_lock), \
+                mock.patch.object(iqrs, 'ordered_results', side_effect=record_lock), \
+                self.app.test_client() as tc:
+            r = tc.post('/refine', data={'sid': iqrs.uuid})
+            self.assertStatusCode(r, 201)
+            r = tc.get('/get_results?sid={}'.format(iqrs.uuid))
+            self.assertStatusCode(r, 200)
+        assert held == [False, False]
+
     def _test_getter_no_sid(self, endpoint: str) -> None:
         """
         Test common getter response to providing no session ID.
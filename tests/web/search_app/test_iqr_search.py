@@ -1,9 +1,23 @@
+import base64
+from io import BytesIO
+import json
 import os
+import tempfile
 import unittest
 import unittest.mock as mock
+import zipfile
 
-from smqtk_iqr.web.search_app.modules.iqr.iqr_search import IqrSearch
+import flask
+import PIL.Image
+import pytest
+import requests
+
+from smqtk_iqr.web.search_app.modules.iqr.iqr_search import (
+    IqrSearch, WhiteNoise, _b64encode_file, _read_image_size
+)
 from smqtk_iqr.web.search_app import IqrSearchDispatcher
+from smqtk_iqr.iqr import IqrSession
+from smqtk_dataprovider.impls.data_element.memory import DataMemoryElement
 from smqtk_dataprovider.impls.data_set.memory import DataMemorySet
 
 from smqtk_core import Pluggable
@@ -38,3 +52,454 @@ class TestIqrSearch (unittest.TestCase):
 
         assert app.mod_upload is not None
         assert app.mod_static_dir is not None
+
+    def test_work_dir_resolved(self) -> None:
+        """
+        Test that a relative working directory is resolved at construction.
+        """
+        app = IqrSearch(self.dispatcher_app, "test", self.dataset, ".")
+        expected = os.path.abspath(".")
+        with mock.patch('os.getcwd', return_value='/elsewhere'):
+            assert app.work_dir == expected
+
+    @unittest.skipIf(WhiteNoise is None, "WhiteNoise is not installed")
+    def test_static_data_whitenoise(self) -> None:
+        """
+        Test that files in the static data directory at creation, and files
+        registered after being written, are served by WhiteNoise with caching
+        headers.
+        """
+        with tempfile.TemporaryDirectory() as work_dir:
+            static_dir = os.path.join(work_dir, 'static')
+            os.makedirs(static_dir)
+            with open(os.path.join(static_dir, 'foo.txt'), 'w') as f:
+                f.write('bar')
+            app = IqrSearch(self.dispatcher_app, "test", self.dataset,
+                            work_dir)
+            r = app.test_client().get('/static/data/foo.txt')
+            assert r.status_code == 200
+            assert r.data == b'bar'
+            assert 'max-age=3600' in r.headers['Cache-Control']
+            r.close()
+
+            new_path = os.path.join(static_dir, 'baz.txt')
+            with open(new_path, 'w') as f:
+                f.write('qux')
+            app._serve_static_file(new_path, app._static_link(new_path))
+            r = app.test_client().get('/static/data/baz.txt')
+            assert r.status_code == 200
+            assert r.data == b'qux'
+            assert 'max-age=3600' in r.headers['Cache-Control']
+            r.close()
+
+    def test_preview_info_cache_eviction(self) -> None:
+        """
+        Test that the preview information cache evicts the least recently
+        used entries beyond its size limit.
+        """
+        app = IqrSearch(self.dispatcher_app, "test", self.dataset, ".")
+        with mock.patch.object(IqrSearch, 'PREVIEW_INFO_CACHE_SIZE', 2):
+            app._cache_preview_info('a', {'shape': (1, 1)})
+            app._cache_preview_info('b', {'shape': (2, 2)})
+            # Touching 'a' again makes 'b' the least recently used.
+            app._cache_preview_info('a', {'shape': (1, 1)})
+            app._cache_preview_info('c', {'shape': (3, 3)})
+        assert list(app._preview_info_cache) == ['a', 'c']
+
+    def test_known_service_sids(self) -> None:
+        """
+        Test that the IQR service is only queried for its sessions the first
+        time a session ID is seen, and again after that session is reset.
+        """
+        with tempfile.TemporaryDirectory() as work_dir:
+            app = IqrSearch(self.dispatcher_app, "test", self.dataset,
+                            work_dir)
+            app._iqr_service = mock.Mock()
+            app._iqr_service.get.return_value.json.return_value = \
+                {'session_uuids': []}
+            with app.test_request_context('/'):
+                flask.session.sid = 'sid0'  # type: ignore
+                assert app.get_current_iqr_session() == 'sid0'
+                assert app.get_current_iqr_session() == 'sid0'
+                assert app._iqr_service.get.call_count == 1
+                app._iqr_service.post.assert_called_once_with('session',
+                                                              sid='sid0')
+
+                app.view_functions['reset_iqr_session'].__wrapped__()  # type: ignore
+                app.get_current_iqr_session()
+                assert app._iqr_service.get.call_count == 2
+
+    def test_preview_info_session_example_data(self) -> None:
+        """
+        Test that cached preview information of session example data is not
+        served to other sessions.
+        """
+        with tempfile.TemporaryDirectory() as work_dir:
+            app = IqrSearch(self.dispatcher_app, "test", self.dataset,
+                            work_dir)
+            buf = BytesIO()
+            PIL.Image.new('RGB', (3, 2)).save(buf, format='PNG')
+            example = DataMemoryElement(buf.getvalue(), 'image/png')
+            uid = str(example.uuid())
+            app._iqr_example_data['sid0'] = {uid: example}
+            app._iqr_example_data['sid1'] = {}
+            view = app.view_functions['get_ingest_item_image_rep'].__wrapped__  # type: ignore
+            with app.test_request_context('/get_data_preview_image',
+                                          query_string={'uid': uid}):
+                app.get_current_iqr_session = mock.Mock(  # type: ignore
+                    return_value='sid0')
+                r = view().json
+                assert r['success'] and r['shape'] == [3, 2]
+                # Cached for the owning session.
+                assert view().json == r
+
+                app.get_current_iqr_session.return_value = 'sid1'
+                r = view().json
+                assert not r['success']
+                assert r['shape'] is None
+
+    def test_known_service_sid_lost(self) -> None:
+        """
+        Test that a known session ID is forgotten when the IQR service
+        responds that it does not have the session, so that it is re-created
+        on the next request.
+        """
+        with tempfile.TemporaryDirectory() as work_dir:
+            app = IqrSearch(self.dispatcher_app, "test", self.dataset,
+                            work_dir)
+            app._iqr_service = mock.Mock()
+            app._iqr_service.get.return_value.json.return_value = \
+                {'session_uuids': []}
+            not_found = mock.Mock(status_code=404)
+            not_found.raise_for_status.side_effect = requests.HTTPError()
+            with app.test_request_context('/'):
+                flask.session.sid = 'sid0'  # type: ignore
+                app.get_current_iqr_session()
+                assert 'sid0' in app._known_service_sids
+
+                # e.g. the session expired on the service.
+                app._iqr_service.post.return_value = not_found
+                with pytest.raises(requests.HTTPError):
+                    app.view_functions['iqr_refine'].__wrapped__()  # type: ignore
+                assert 'sid0' not in app._known_service_sids
+
+                app._iqr_service.post.return_value = mock.Mock(status_code=200)
+                app.get_current_iqr_session()
+                assert app._iqr_service.get.call_count == 2
+                app._iqr_service.post.assert_called_with('session', sid='sid0')
+
+                # Reset also forgets the session when it is not found.
+                app._iqr_service.put.return_value = not_found
+                with pytest.raises(requests.HTTPError):
+                    app.view_functions['reset_iqr_session'].__wrapped__()  # type: ignore
+                assert 'sid0' not in app._known_service_sids
+
+    def test_has_uuid_cached(self) -> None:
+        """
+        Test that data set UUID membership is only queried once per UUID.
+        """
+        with mock.patch.object(self.dataset, 'has_uuid',
+                               return_value=False) as m_has_uuid:
+            app = IqrSearch(self.dispatcher_app, "test", self.dataset, ".")
+            assert not app._has_uuid_cached('a')
+            assert not app._has_uuid_cached('a')
+            assert not app._has_uuid_cached('b')
+        assert m_has_uuid.call_count == 2
+
+    def test_get_random_uids_cached(self) -> None:
+        """
+        Test that data set UUIDs are only listed once, while each request is
+        given a permutation of all of them.
+        """
+        self.dataset.add_data(*(DataMemoryElement(bytes([i]))
+                                for i in range(10)))
+        expected = sorted(map(str, self.dataset.uuids()))
+        app = IqrSearch(self.dispatcher_app, "test", self.dataset, ".")
+        view = app.view_functions['get_random_uids'].__wrapped__  # type: ignore
+        with mock.patch.object(self.dataset, 'uuids',
+                               wraps=self.dataset.uuids) as m_uuids, \
+                app.test_request_context('/get_random_uids'):
+            for _ in range(3):
+                assert sorted(view().json['uids']) == expected
+        assert m_uuids.call_count == 1
+        assert sorted(map(str, app._all_uuids_cache or [])) == expected
+
+        with app.test_request_context('/get_random_uids?n=3'):
+            uids = view().json['uids']
+        assert len(uids) == len(set(uids)) == 3
+        assert set(uids) <= set(expected)
+        with app.test_request_context('/get_random_uids?n=100'):
+            assert sorted(view().json['uids']) == expected
+
+    def test_is_ready(self) -> None:
+        """
+        Test that the pre-serialized ready response is valid JSON.
+        """
+        app = IqrSearch(self.dispatcher_app, "test", self.dataset, ".")
+        r = app.test_client().get('/is_ready')
+        assert r.status_code == 200
+        assert r.mimetype == 'application/json'
+        assert r.json == {'alive': True}
+
+    def test_adjudication_cache(self) -> None:
+        """
+        Test that adjudication states are reused until they expire or the
+        session's adjudications are modified.
+        """
+        app = IqrSearch(self.dispatcher_app, "test", self.dataset, ".")
+        app._iqr_service = mock.Mock()
+        app._iqr_service.get.return_value.content = \
+            b'{"is_pos": true, "is_neg": false}'
+        expected = {'is_pos': True, 'is_neg': False}
+
+        assert app._get_adjudication('sid0', 'a') == expected
+        assert app._get_adjudication('sid0', 'a') == expected
+        assert app._iqr_service.get.call_count == 1
+        # Other UUIDs and sessions are cached separately.
+        app._get_adjudication('sid0', 'b')
+        app._get_adjudication('sid1', 'a')
+        assert app._iqr_service.get.call_count == 3
+
+        app._invalidate_adjudication_cache('sid0')
+        app._get_adjudication('sid0', 'a')
+        app._get_adjudication('sid1', 'a')
+        assert app._iqr_service.get.call_count == 4
+
+        with mock.patch.object(IqrSearch, 'ADJUDICATION_CACHE_TTL', 0):
+            app._get_adjudication('sid0', 'c')
+            app._get_adjudication('sid0', 'c')
+        assert app._iqr_service.get.call_count == 6
+
+    def test_adjudicate_forwarding(self) -> None:
+        """
+        Test that adjudication additions are forwarded to the IQR service
+        verbatim and removals are combined into neutral adjudications.
+        """
+        app = IqrSearch(self.dispatcher_app, "test", self.dataset, ".")
+        app._iqr_service = mock.Mock()
+        app.get_current_iqr_session = mock.Mock(  # type: ignore
+            return_value='sid0')
+        with app.test_request_context('/adjudicate', method='POST', data={
+            'add_pos': '["a", "b"]',
+            'remove_pos': '["c"]',
+            'remove_neg': '["c", "d"]',
+        }):
+            app.view_functions['adjudicate'].__wrapped__()  # type: ignore
+        args, kwargs = app._iqr_service.post.call_args
+        assert args == ('adjudicate',)
+        assert kwargs['pos'] == '["a", "b"]'
+        assert kwargs['neg'] == '[]'
+        assert sorted(json.loads(kwargs['neutral'])) == ['c', 'd']
+
+    def test_static_file_persisted(self) -> None:
+        """
+        Test that static copies of data are named by UUID and reused by a new
+        instance over the same work directory.
+        """
+        with tempfile.TemporaryDirectory() as work_dir:
+            de = DataMemoryElement(b'static bytes', 'image/png')
+            app = IqrSearch(self.dispatcher_app, "test", self.dataset,
+                            work_dir)
+            path = app._get_static_file(de)
+            assert os.path.basename(path) == '%s.png' % de.uuid()
+            with open(path, 'rb') as f:
+                assert f.read() == b'static bytes'
+            assert os.listdir(os.path.dirname(path)) == [
+                os.path.basename(path)]
+
+            app = IqrSearch(self.dispatcher_app, "test", self.dataset,
+                            work_dir)
+            with mock.patch('smqtk_iqr.web.search_app.modules.iqr.iqr_search.'
+                            'tempfile.mkstemp') as m_mkstemp:
+                assert app._get_static_file(de) == path
+            m_mkstemp.assert_not_called()
+
+    def test_service_json_passed_through(self) -> None:
+        """
+        Test that JSON responses from the IQR service are returned as-is.
+        """
+        app = IqrSearch(self.dispatcher_app, "test", self.dataset, ".")
+        app._iqr_service = mock.Mock()
+        app._iqr_service.get.return_value.content = b'{"uuid": "sid0"}'
+        app.get_current_iqr_session = mock.Mock(  # type: ignore
+            return_value='sid0')
+        with app.test_request_context('/iqr_session_info'):
+            r = app.view_functions['iqr_session_info'].__wrapped__()  # type: ignore
+        assert r.mimetype == 'application/json'
+        assert r.get_data() == b'{"uuid": "sid0"}'
+
+    def test_static_link(self) -> None:
+        """
+        Test that paths within the static directory are made into static
+        links, whether or not they are in normal form.
+        """
+        with tempfile.TemporaryDirectory() as work_dir:
+            app = IqrSearch(self.dispatcher_app, "test", self.dataset,
+                            work_dir)
+            static_dir = os.path.join(work_dir, 'static')
+            assert app._static_link(
+                os.path.join(static_dir, 'previews', 'a.png')
+            ) == 'static/data/previews/a.png'
+            assert app._static_link(
+                os.path.join(work_dir, 'foo', '..', 'static', 'b.png')
+            ) == 'static/data/b.png'
+
+    def test_read_image_size(self) -> None:
+        """
+        Test that image dimensions read from file headers match those reported
+        by PIL, including for formats read through PIL itself.
+        """
+        img = PIL.Image.new('RGB', (37, 21))
+        with tempfile.TemporaryDirectory() as d:
+            for fname, kwargs in [('a.png', {}),
+                                  ('b.jpg', {}),
+                                  ('c.jpg', {'progressive': True}),
+                                  ('d.gif', {})]:
+                path = os.path.join(d, fname)
+                img.save(path, **kwargs)
+                with mock.patch('PIL.Image.open',
+                                side_effect=PIL.Image.open) as m_open:
+                    assert tuple(_read_image_size(path)) == (37, 21)
+                    # PIL is only needed for non-PNG/JPEG images.
+                    assert m_open.called == fname.endswith('.gif')
+
+    def test_b64encode_file(self) -> None:
+        """
+        Test that chunk-wise file encoding matches encoding the whole content.
+        """
+        data = os.urandom(1000)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'data.bin')
+            with open(path, 'wb') as f:
+                f.write(data)
+            with mock.patch('smqtk_iqr.web.search_app.modules.iqr.iqr_search.'
+                            '_B64_ENCODE_CHUNK_SIZE', 9):
+                assert _b64encode_file(path) == base64.b64encode(data)
+
+    def test_state_working_data_round_trip(self) -> None:
+        """
+        Test that session example data is packaged into downloaded state as
+        raw entries, alongside the service state entries, and is restored
+        from an uploaded state package.
+        """
+        with tempfile.TemporaryDirectory() as work_dir:
+            app = IqrSearch(self.dispatcher_app, "test", self.dataset,
+                            work_dir)
+            sid = 'sid0'
+            app._iqr_work_dirs[sid] = os.path.join(work_dir, sid)
+            os.makedirs(app._iqr_work_dirs[sid])
+            example = DataMemoryElement(b'example bytes', 'image/png')
+            example_uid = str(example.uuid())
+            others = [DataMemoryElement(b'other %d' % i, 'image/jpeg')
+                      for i in range(4)]
+            app._iqr_example_data[sid] = {
+                e.uuid(): e for e in [example] + others
+            }
+
+            service_state = BytesIO()
+            with zipfile.ZipFile(service_state, 'w') as z:
+                z.writestr(IqrSession.STATE_ZIP_FILENAME, '{"version": 2}')
+                z.writestr('pos.npy', b'vectors')
+            app._iqr_service = mock.Mock()
+            app._iqr_service.get.return_value.content = json.dumps({
+                'state_b64':
+                    base64.b64encode(service_state.getvalue()).decode(),
+            }).encode()
+            app.get_current_iqr_session = mock.Mock(  # type: ignore
+                return_value=sid)
+
+            with app.test_request_context('/get_iqr_state'):
+                r = app.view_functions['iqr_session_state'].__wrapped__()  # type: ignore
+                r.direct_passthrough = False
+                state_pkg = r.get_data()
+            with zipfile.ZipFile(BytesIO(state_pkg)) as z:
+                manifest = json.loads(
+                    z.read(IqrSearch.STATE_WORKING_DATA_MANIFEST))
+                assert manifest[example_uid] == 'image/png'
+                assert len(manifest) == 5
+                data_name = IqrSearch.STATE_WORKING_DATA_PREFIX + example_uid
+                assert z.read(data_name) == b'example bytes'
+                assert z.getinfo(data_name).compress_type == zipfile.ZIP_STORED
+                assert z.read('pos.npy') == b'vectors'
+
+            # Upload the package back in.
+            upload_path = os.path.join(work_dir, 'upload.IqrState')
+            with open(upload_path, 'wb') as f:
+                f.write(state_pkg)
+            app.mod_upload = mock.Mock()
+            app.mod_upload.get_path_for_id.return_value = upload_path
+            with app.test_request_context('/set_iqr_state', method='PUT',
+                                          data={'fid': 'f0'}):
+                app.view_functions['set_iqr_session_state'].__wrapped__()  # type: ignore
+            assert not os.path.exists(upload_path)
+            restored = app._iqr_example_data[sid][example_uid]
+            assert restored.get_bytes() == b'example bytes'
+            for e in others:
+                assert app._iqr_example_data[sid][str(e.uuid())].get_bytes() \
+                    == e.get_bytes()
+
+            # The service only receives its own state entries.
+            put_kwargs = app._iqr_service.put.call_args[1]
+            with zipfile.ZipFile(BytesIO(base64.b64decode(
+                    put_kwargs['state_base64']))) as z:
+                assert sorted(z.namelist()) == \
+                    sorted([IqrSession.STATE_ZIP_FILENAME, 'pos.npy'])
+
+    def test_package_state_spooled(self) -> None:
+        """
+        Test that a state package larger than the spool size is still built
+        completely.
+        """
+        app = IqrSearch(self.dispatcher_app, "test", self.dataset, ".")
+        service_state = BytesIO()
+        with zipfile.ZipFile(service_state, 'w') as z:
+            z.writestr(IqrSession.STATE_ZIP_FILENAME, '{"version": 2}')
+        example = DataMemoryElement(os.urandom(4096), 'image/png')
+        with mock.patch.object(IqrSearch, 'STATE_PACKAGE_SPOOL_SIZE', 1024):
+            f = app._package_state(service_state.getvalue(),
+                                   {example.uuid(): example})
+        with f, zipfile.ZipFile(f) as z:
+            assert z.read(IqrSearch.STATE_WORKING_DATA_PREFIX +
+                          str(example.uuid())) == example.get_bytes()
+            assert z.read(IqrSession.STATE_ZIP_FILENAME) == b'{"version": 2}'
+
+    def test_set_state_legacy_working_data(self) -> None:
+        """
+        Test that state packages with base64 encoded working data in the state
+        JSON are still restored, decoding across multiple chunks.
+        """
+        with tempfile.TemporaryDirectory() as work_dir:
+            app = IqrSearch(self.dispatcher_app, "test", self.dataset,
+                            work_dir)
+            sid = 'sid0'
+            app._iqr_work_dirs[sid] = os.path.join(work_dir, sid)
+            os.makedirs(app._iqr_work_dirs[sid])
+            app._iqr_example_data[sid] = {}
+            app._iqr_service = mock.Mock()
+            app.get_current_iqr_session = mock.Mock(  # type: ignore
+                return_value=sid)
+
+            data = bytes(range(256)) * 3
+            upload_path = os.path.join(work_dir, 'upload.IqrState')
+            with zipfile.ZipFile(upload_path, 'w') as z:
+                z.writestr(IqrSession.STATE_ZIP_FILENAME, json.dumps({
+                    'pos': [], 'neg': [],
+                    'working_data': {'abc': {
+                        'content_type': 'image/png',
+                        'bytes_base64': base64.b64encode(data).decode(),
+                    }},
+                }))
+            app.mod_upload = mock.Mock()
+            app.mod_upload.get_path_for_id.return_value = upload_path
+            with mock.patch('smqtk_iqr.web.search_app.modules.iqr.iqr_search.'
+                            '_COPY_CHUNK_SIZE', 16), \
+                    app.test_request_context('/set_iqr_state', method='PUT',
+                                             data={'fid': 'f0'}):
+                app.view_functions['set_iqr_session_state'].__wrapped__()  # type: ignore
+            assert app._iqr_example_data[sid]['abc'].get_bytes() == data
+
+            put_kwargs = app._iqr_service.put.call_args[1]
+            with zipfile.ZipFile(BytesIO(base64.b64decode(
+                    put_kwargs['state_base64']))) as z:
+                assert json.loads(z.read(IqrSession.STATE_ZIP_FILENAME)) == \
+                    {'pos': [], 'neg': []}